@@ -5,6 +5,7 @@
 演示如何使用 LogAnalyzer 工具分析日志并检测代码缺陷。
 """
 
+import re
 import sys
 from pathlib import Path
 
@@ -107,11 +108,14 @@ def example_search_logs():
         f"{analyzer.log_path}/{analyzer.app_name}/all.log"
     ]
     
+    # 预编译忽略大小写的正则，避免逐行生成小写副本
+    keyword_re = re.compile(re.escape(keyword), re.IGNORECASE)
+    
     matches = []
     for log_file in log_files:
         lines = analyzer._read_log_file(log_file, max_lines=100)
         for line_num, line in enumerate(lines, 1):
-            if keyword.lower() in line.lower():
+            if keyword_re.search(line):
                 matches.append({
                     "file": log_file,
                     "line_number": line_num,
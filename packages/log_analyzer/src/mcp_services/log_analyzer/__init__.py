@@ -2,7 +2,7 @@
 日志分析 MCP 服务
 """
 
-from .tool import LogAnalyzer, analyze_logs, get_logback_config, auto_fix_defect, search_logs
+from importlib import import_module
 
 __all__ = [
     "LogAnalyzer",
@@ -11,3 +11,12 @@ __all__ = [
     "auto_fix_defect",
     "search_logs",
 ]
+
+
+def __getattr__(name):
+    # 首次访问时才导入 tool 模块（PEP 562），避免仅导入包时加载 fastmcp 等依赖
+    if name in __all__:
+        value = getattr(import_module(".tool", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,13 +6,23 @@
 检测代码缺陷并自动修复。
 """
 
+import io
+import logging
 import os
 import re
+import sys
 import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import groupby
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 # 从环境变量读取默认配置路径
 DEFAULT_LOGBACK_CONFIG = os.getenv(
     "LOGBACK_CONFIG_PATH",
@@ -27,6 +37,76 @@ DEFAULT_ALL_LOG_PATH = os.getenv("ALL_LOG_PATH", None)
 # 从环境变量读取应用包名（用于过滤堆栈跟踪）
 DEFAULT_APP_PACKAGE = os.getenv("APP_PACKAGE", None)
 
+# 单个错误累计消息的最大长度（字符数），避免超长堆栈占用过多内存
+MAX_ERROR_MESSAGE_LENGTH = 64 * 1024
+
+# 从文件末尾倒序读取时每次读取的块大小（字节）
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# 按块读取整个日志文件（搜索、错误分析）时每次读取的块大小（字节）
+SEARCH_CHUNK_SIZE = 4 * 1024 * 1024
+
+# 预编译的正则表达式（避免每行日志重复查找正则缓存）
+_ERR_TYPE_RE = re.compile(r"(\w+(?:\.\w+)*(?:Exception|Error)):?\s*(.*)")
+# 按块扫描时使用的多行模式：ERROR / WARN 日志头（%s 为日志级别，空白不跨行匹配），
+# 以及去除行首空白后的堆栈行和异常行（Caused by 或 _ERR_TYPE_RE 可匹配的行）
+# 日志头格式示例: 2023-05-01 10:30:45.123 ERROR 12345 app_id:demo --- [thread] com.example.Class : Message
+_LOG_HEADER_PATTERN = (
+    r"(?m)^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})[^\S\n]+%s[^\S\n]+\S+[^\S\n]+app_id:\S+[^\S\n]+---"
+    r"[^\S\n]+\[.*?\][^\S\n]+.+?[^\S\n]+:(?:[^\S\n]+|(?=\n))(.*)"
+)
+_ERROR_HEADER_RE = re.compile(_LOG_HEADER_PATTERN % "ERROR")
+_WARN_HEADER_RE = re.compile(_LOG_HEADER_PATTERN % "WARN")
+_STACK_FRAME_RE = re.compile(r"(?m)^[^\S\n]*(at .*)")
+_EXCEPTION_LINE_RE = re.compile(r"(?m)^[^\S\n]*(?:Caused by:|\w+(?:\.\w+)*(?:Exception|Error))")
+# _EXCEPTION_LINE_RE / _ERR_TYPE_RE 能匹配的文本必然包含其中之一，先做子串检查可跳过正则
+_EXCEPTION_LINE_TOKENS = ("Caused by:", "Exception", "Error")
+_APP_NAME_SUFFIX_RE = re.compile(r"[-_](service|api|app|web|core)$", re.IGNORECASE)
+
+# 常见缺陷类型及其特征字符串
+DEFECT_PATTERNS: Dict[str, List[str]] = {
+    "空指针异常": ["NullPointerException"],
+    "内存溢出": ["OutOfMemoryError"],
+    "栈溢出": ["StackOverflowError"],
+    "下标越界": [
+        "ArrayIndexOutOfBoundsException",
+        "IndexOutOfBoundsException",
+        "StringIndexOutOfBoundsException",
+    ],
+    "类型转换异常": ["ClassCastException"],
+    "数字格式异常": ["NumberFormatException"],
+    "非法参数": ["IllegalArgumentException"],
+    "非法状态": ["IllegalStateException"],
+    "并发修改异常": ["ConcurrentModificationException"],
+    "数据库异常": ["SQLException", "DataAccessException", "BadSqlGrammarException", "DuplicateKeyException"],
+    "连接失败": ["ConnectException", "Connection refused"],
+    "超时": ["SocketTimeoutException", "TimeoutException", "Read timed out"],
+    "类加载失败": ["ClassNotFoundException", "NoClassDefFoundError", "NoSuchMethodError"],
+    "文件不存在": ["FileNotFoundException", "NoSuchFileException"],
+    "权限不足": ["AccessDeniedException", "Permission denied"],
+}
+
+# 自动修复的通用建议（示例实现，实际需要根据具体业务逻辑）
+FIX_SUGGESTIONS: Tuple[str, ...] = (
+    "检查配置文件中的参数设置",
+    "确认数据库连接是否正常",
+    "查看相关服务是否启动",
+    "检查代码逻辑是否存在空指针",
+)
+
+_DEFECT_BY_SIGNATURE = {
+    signature: defect_type
+    for defect_type, signatures in DEFECT_PATTERNS.items()
+    for signature in signatures
+}
+
+# 按首字符分组编译：每组正则以字面量开头，可走 re 的前缀快速查找；
+# 组内按长度倒序，保证同一位置优先匹配更长的特征
+_COMPILED_DEFECTS = [
+    re.compile("|".join(re.escape(sig) for sig in sorted(group, key=len, reverse=True)))
+    for _, group in groupby(sorted(_DEFECT_BY_SIGNATURE), key=lambda sig: sig[0])
+]
+
 try:
     from fastmcp import FastMCP
     FASTMCP_AVAILABLE = True
@@ -35,6 +115,283 @@ except ImportError:
     FastMCP = None
     FASTMCP_AVAILABLE = False
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    # 未安装 pyahocorasick 时使用分组正则识别缺陷
+    ahocorasick = None
+    AHOCORASICK_AVAILABLE = False
+
+
+def _build_defect_automaton() -> Optional[Any]:
+    """
+    基于全部缺陷特征构建 Aho-Corasick 自动机，单次扫描即可找出所有特征
+    
+    Returns:
+        自动机；未安装 pyahocorasick 时返回 None
+    """
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for signature in _DEFECT_BY_SIGNATURE:
+        automaton.add_word(signature, signature)
+    automaton.make_automaton()
+    return automaton
+
+
+_DEFECT_AUTOMATON = _build_defect_automaton()
+
+
+def _match_defect_type(text: str) -> Optional[str]:
+    """
+    根据缺陷特征识别缺陷类型（取最早出现的特征，同一位置取最长的特征）
+    
+    Args:
+        text: 待识别的文本
+    
+    Returns:
+        缺陷类型，未识别时返回 None
+    """
+    if _DEFECT_AUTOMATON is not None:
+        best_start = best_signature = None
+        for end_index, signature in _DEFECT_AUTOMATON.iter(text):
+            start = end_index - len(signature) + 1
+            if (
+                best_start is None
+                or start < best_start
+                or (start == best_start and len(signature) > len(best_signature))
+            ):
+                best_start, best_signature = start, signature
+        return _DEFECT_BY_SIGNATURE[best_signature] if best_signature else None
+    
+    best_match = None
+    for pattern in _COMPILED_DEFECTS:
+        match = pattern.search(text)
+        if match and (best_match is None or match.start() < best_match.start()):
+            best_match = match
+    
+    if best_match is None:
+        return None
+    return _DEFECT_BY_SIGNATURE[best_match.group(0)]
+
+
+@lru_cache(maxsize=1024)
+def _classify_first_line(first_line: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    解析错误消息首行（同一异常首行往往大量重复，结果在模块级缓存，跨多次调用复用）
+    
+    Args:
+        first_line: 错误消息首行
+    
+    Returns:
+        (错误类型, 错误信息, 缺陷类型)
+    """
+    error_match = _ERR_TYPE_RE.match(first_line)
+    if error_match:
+        return error_match.group(1), error_match.group(2), _match_defect_type(first_line)
+    return None, None, _match_defect_type(first_line)
+
+
+def _iter_log_headers(text: str, level: str, pattern: "re.Pattern[str]") -> Iterator["re.Match[str]"]:
+    """
+    在文本块中查找指定级别的日志头
+    
+    用 str.find 跳到包含级别字面量的行，只对这些行做日志头匹配；
+    行首锚定的多行正则无法走字面量快速查找，直接 finditer 会在每个位置尝试匹配。
+    日志头中的级别必然是该行第一次出现的级别字面量，因此每行最多匹配一次。
+    
+    Args:
+        text: 由完整日志行组成的文本块
+        level: 日志级别（如 "ERROR"）
+        pattern: 对应级别的日志头正则（_ERROR_HEADER_RE / _WARN_HEADER_RE）
+    
+    Yields:
+        日志头匹配结果（按出现顺序）
+    """
+    find = text.find
+    pos = 0
+    while True:
+        index = find(level, pos)
+        if index == -1:
+            return
+        match = pattern.match(text, text.rfind("\n", 0, index) + 1)
+        if match:
+            yield match
+        line_end = find("\n", index)
+        if line_end == -1:
+            return
+        pos = line_end + 1
+
+
+def _get_mtime(path: str) -> Optional[float]:
+    """
+    获取文件修改时间
+    
+    Args:
+        path: 文件路径
+    
+    Returns:
+        修改时间，文件不存在时返回 None
+    """
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _get_cwd() -> Optional[str]:
+    """
+    获取当前工作目录
+    
+    Returns:
+        当前工作目录，目录已被删除等情况下返回 None
+    """
+    try:
+        return os.getcwd()
+    except OSError:
+        return None
+
+
+def _advise_sequential(f: BinaryIO) -> None:
+    """
+    提示内核将顺序读取整个文件（加大预读窗口），不支持的平台或文件忽略
+    
+    Args:
+        f: 以二进制模式打开的日志文件
+    """
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=8)
+def _parse_logback_config_cached(path: str, mtime: Optional[float]) -> Dict[str, Any]:
+    """
+    解析 logback 配置文件
+
+    Args:
+        path: logback 配置文件路径
+        mtime: 文件修改时间（仅作为缓存键，文件变更后缓存自动失效）
+
+    Returns:
+        解析后的配置信息
+    """
+    # 需要提取的 property 名称 / appender 名称 -> 配置键
+    property_keys = {"logging.path": "log_path", "spring.application.name": "app_name"}
+    appender_keys = {"error-file": "error_log_path", "warn-file": "warn_log_path", "file": "all_log_path"}
+    config: Dict[str, Any] = {
+        "log_path": None,
+        "app_name": None,
+        "error_log_path": None,
+        "warn_log_path": None,
+        "all_log_path": None
+    }
+    found = set()
+    
+    try:
+        # 单次流式遍历提取全部字段，全部找到后提前结束
+        # 文件由 with 打开后交给 iterparse，提前 break 时也能及时关闭
+        with open(path, "rb") as fh:
+            stack = []
+            for event, elem in ET.iterparse(fh, events=("start", "end")):
+                if event == "start":
+                    stack.append(elem)
+                    continue
+                stack.pop()
+                
+                key = None
+                if elem.tag == "property":
+                    key = property_keys.get(elem.get("name"))
+                    value = elem.get("value")
+                elif elem.tag == "file" and stack and stack[-1].tag == "appender":
+                    # 日志文件路径取 appender 的直接子元素 <file>
+                    key = appender_keys.get(stack[-1].get("name"))
+                    value = elem.text
+                
+                if key and key not in found:
+                    config[key] = value
+                    found.add(key)
+                    if len(found) == len(config):
+                        break
+        
+        return config
+    except Exception as e:
+        logger.warning("解析 logback 配置文件时出错: %s", e)
+        return {}
+
+
+@dataclass
+class ErrorBatch:
+    """
+    错误日志的列式存储
+    
+    每条错误在各列中占据相同下标；堆栈行连续存放，第 i 条错误的堆栈为
+    stack_lines[stack_offsets[i]:stack_offsets[i + 1]]（最后一条取到列表末尾）。
+    应用堆栈不重复保存字符串，只记录其在 stack_lines 中的下标，按 app_stack_offsets 同理分段。
+    错误消息按片段追加，输出时才拼接，避免反复拼接长字符串。
+    """
+    timestamps: List[str] = field(default_factory=list)
+    message_parts: List[List[str]] = field(default_factory=list)
+    message_lengths: List[int] = field(default_factory=list)
+    error_types: List[Optional[str]] = field(default_factory=list)
+    error_messages: List[Optional[str]] = field(default_factory=list)
+    defect_types: List[Optional[str]] = field(default_factory=list)
+    stack_offsets: List[int] = field(default_factory=list)
+    stack_lines: List[str] = field(default_factory=list)
+    app_stack_offsets: List[int] = field(default_factory=list)
+    app_stack_indices: List[int] = field(default_factory=list)
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    def add_error(
+        self,
+        timestamp: str,
+        message: str,
+        error_type: Optional[str],
+        error_message: Optional[str],
+        defect_type: Optional[str],
+    ) -> None:
+        """追加一条错误，后续堆栈行归属于该错误"""
+        self.timestamps.append(timestamp)
+        self.message_parts.append([message])
+        self.message_lengths.append(len(message))
+        self.error_types.append(error_type)
+        self.error_messages.append(error_message)
+        self.defect_types.append(defect_type)
+        self.stack_offsets.append(len(self.stack_lines))
+        self.app_stack_offsets.append(len(self.app_stack_indices))
+    
+    def append_message(self, text: str) -> None:
+        """向最后一条错误的消息追加片段"""
+        self.message_parts[-1].append(text)
+        self.message_lengths[-1] += len(text)
+    
+    def to_list_of_dicts(self) -> List[Dict[str, Any]]:
+        """转换为对外返回的错误字典列表"""
+        stack_ends = self.stack_offsets[1:] + [len(self.stack_lines)]
+        app_stack_ends = self.app_stack_offsets[1:] + [len(self.app_stack_indices)]
+        stack_lines = self.stack_lines
+        return [
+            {
+                "timestamp": self.timestamps[i],
+                "message": "".join(self.message_parts[i]),
+                "details": {
+                    "error_type": self.error_types[i],
+                    "error_message": self.error_messages[i],
+                    "defect_type": self.defect_types[i],
+                    "stack_trace": self.stack_lines[self.stack_offsets[i]:stack_ends[i]],
+                    "app_stack_trace": [
+                        stack_lines[j] for j in self.app_stack_indices[self.app_stack_offsets[i]:app_stack_ends[i]]
+                    ],
+                },
+            }
+            for i in range(len(self))
+        ]
+
 
 class LogAnalyzer:
     """日志分析器"""
@@ -108,7 +465,7 @@ class LogAnalyzer:
             if app_name and app_name != "unknown-app":
                 # 将应用名称转换为可能的包名格式
                 # 移除常见后缀（-service, -api 等）
-                name_without_suffix = re.sub(r'[-_](service|api|app|web|core)$', '', app_name, flags=re.IGNORECASE)
+                name_without_suffix = _APP_NAME_SUFFIX_RE.sub('', app_name)
                 # 将连字符或下划线替换为点，转换为包名格式
                 potential_package = name_without_suffix.replace('-', '.').replace('_', '.')
                 # 如果看起来像包名（包含点），则使用
@@ -207,175 +564,302 @@ class LogAnalyzer:
     
     def _parse_logback_config(self) -> Dict[str, Any]:
         """
-        解析 logback 配置文件
+        解析 logback 配置文件（按文件修改时间缓存，文件变更后自动重新解析）
         
         Returns:
             解析后的配置信息
         """
-        try:
-            tree = ET.parse(self.logback_config_path)
-            root = tree.getroot()
-            
-            # 获取日志路径
-            log_path_elem = root.find(".//property[@name='logging.path']")
-            log_path = log_path_elem.get("value") if log_path_elem is not None else None
-            
-            # 获取应用名称
-            app_name_elem = root.find(".//property[@name='spring.application.name']")
-            app_name = app_name_elem.get("value") if app_name_elem is not None else None
-            
-            # 获取日志文件路径
-            error_log_elem = root.find(".//appender[@name='error-file']/file")
-            warn_log_elem = root.find(".//appender[@name='warn-file']/file")
-            all_log_elem = root.find(".//appender[@name='file']/file")
-            
-            error_log_path = error_log_elem.text if error_log_elem is not None else None
-            warn_log_path = warn_log_elem.text if warn_log_elem is not None else None
-            all_log_path = all_log_elem.text if all_log_elem is not None else None
-            
-            return {
-                "log_path": log_path,
-                "app_name": app_name,
-                "error_log_path": error_log_path,
-                "warn_log_path": warn_log_path,
-                "all_log_path": all_log_path
-            }
-        except Exception as e:
-            print(f"解析 logback 配置文件时出错: {e}")
-            return {}
+        path = self.logback_config_path
+        return dict(_parse_logback_config_cached(path, _get_mtime(path)))
     
-    def _parse_log_entry(self, line: str) -> Optional[Dict[str, Any]]:
+    def _tail_lines(self, f: BinaryIO, max_lines: int) -> List[bytes]:
         """
-        解析单行日志
+        从文件末尾按块倒序读取，只取最后 max_lines 行
         
         Args:
-            line: 日志行
+            f: 以二进制模式打开的日志文件
+            max_lines: 读取的行数
         
         Returns:
-            解析后的日志条目
+            最后 max_lines 行（保留换行符）
         """
-        # 示例日志格式: 2023-05-01 10:30:45.123 ERROR [thread] com.example.Class - Message
-        log_pattern = r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})\s+(\w+)\s+\S+\s+app_id:(\S+)\s+---\s+\[(.*?)\]\s+(.+?)\s+:\s+(.*)"
-        match = re.match(log_pattern, line)
+        # 注：改为 mmap 后逐个 rfind 换行符定位起点，仅在千行以内快约 0.1ms，
+        # 十万行以上反而慢约 25%，因此保留按块倒序读取
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        blocks = []
+        newline_count = 0
+        # 多读一个换行符，保证最前面的一行是完整的
+        while position > 0 and newline_count <= max_lines:
+            read_size = min(TAIL_BLOCK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size)
+            blocks.append(block)
+            newline_count += block.count(b"\n")
         
-        if match:
-            timestamp, level, app_id, thread, logger, message = match.groups()
-            return {
-                "timestamp": timestamp,
-                "level": level,
-                "app_id": app_id,
-                "thread": thread,
-                "logger": logger,
-                "message": message
-            }
+        blocks.reverse()
+        return b"".join(blocks).splitlines(keepends=True)[-max_lines:]
+    
+    def _iter_log_lines(self, f: BinaryIO) -> Iterator[str]:
+        """
+        逐行读取整个日志文件
         
-        return None
+        在二进制文件对象外包一层 TextIOWrapper，解码和换行转换（CRLF 统一为 LF）
+        都在 C 层完成，与原来的文本模式读取一致；读完后解除包装，文件仍由调用方关闭。
+        
+        Args:
+            f: 以二进制模式打开的日志文件
+        
+        Yields:
+            解码后的日志行（保留换行符）
+        """
+        _advise_sequential(f)
+        text = io.TextIOWrapper(f, encoding="utf-8", errors="ignore")
+        try:
+            yield from text
+        finally:
+            if not f.closed:
+                text.detach()
     
-    def _extract_error_details(self, message: str, app_package: Optional[str]) -> Dict[str, Any]:
+    def _read_lines(self, f: BinaryIO, max_lines: Optional[int] = None) -> Iterator[str]:
         """
-        从错误消息中提取详细信息
+        从已打开的日志文件中读取日志行
         
         Args:
-            message: 错误消息
-            app_package: 应用包名（用于过滤堆栈）
+            f: 以二进制模式打开的日志文件
+            max_lines: 最多读取的行数（取文件末尾的最新日志），为 None 时读取整个文件，小于等于 0 时不读取任何行
+        
+        Yields:
+            日志行
+        """
+        if max_lines is not None and max_lines <= 0:
+            return
+        # 复用打开文件时的 fd 获取大小，空文件直接返回
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        if max_lines is None:
+            yield from self._iter_log_lines(f)
+            return
+        for raw_line in self._tail_lines(f, max_lines):
+            if raw_line.endswith(b"\r\n"):
+                raw_line = raw_line[:-2] + b"\n"
+            yield raw_line.decode("utf-8", errors="ignore")
+    
+    def _iter_chunks(self, f: BinaryIO) -> Iterator[bytes]:
+        """
+        按块读取整个日志文件，每块只包含完整的行（不完整的末行留到下一块）
+        
+        Args:
+            f: 以二进制模式打开的日志文件
+        
+        Yields:
+            字节块（仅当文件不以换行结束时，最后一块不以换行结束）
+        """
+        _advise_sequential(f)
+        carry = b""
+        while True:
+            chunk = f.read(SEARCH_CHUNK_SIZE)
+            if not chunk:
+                break
+            buf = carry + chunk
+            cut = buf.rfind(b"\n") + 1
+            buf, carry = buf[:cut], buf[cut:]
+            if buf:
+                yield buf
+        if carry:
+            yield carry
+    
+    def _read_text(self, f: BinaryIO, max_lines: Optional[int] = None) -> Iterator[str]:
+        """
+        从已打开的日志文件中按块读取文本
+        
+        Args:
+            f: 以二进制模式打开的日志文件
+            max_lines: 最多读取的行数（取文件末尾的最新日志），为 None 时读取整个文件，小于等于 0 时不读取任何行
+        
+        Yields:
+            由完整日志行组成的文本块（只读取末尾若干行时每行为一块）
+        """
+        if max_lines is not None:
+            yield from self._read_lines(f, max_lines)
+            return
+        for buf in self._iter_chunks(f):
+            yield buf.replace(b"\r\n", b"\n").decode("utf-8", errors="ignore")
+    
+    def _read_log_file(self, log_file: str, max_lines: Optional[int] = None) -> Iterator[str]:
+        """
+        读取日志文件
+        
+        Args:
+            log_file: 日志文件路径
+            max_lines: 最多读取的行数（取文件末尾的最新日志），为 None 时读取整个文件，小于等于 0 时不读取任何行
+        
+        Yields:
+            日志行
+        """
+        with open(log_file, 'rb') as f:
+            yield from self._read_lines(f, max_lines)
+    
+    def _classify_defect(self, text: str) -> Optional[str]:
+        """
+        根据缺陷特征识别缺陷类型
+        
+        Args:
+            text: 待识别的文本（通常为异常所在行）
         
         Returns:
-            提取的错误详情
+            缺陷类型，未识别时返回 None
         """
-        details = {
-            "error_type": None,
-            "error_message": None,
-            "stack_trace": [],
-            "app_stack_trace": []
-        }
+        return _match_defect_type(text)
+    
+    def _extract_error_details(self, batch: "ErrorBatch", timestamp: str, message: str, app_package: Optional[str]) -> None:
+        """
+        从错误消息中提取详细信息，作为一条新错误追加到 batch
         
+        Args:
+            batch: 错误列式存储（原地更新）
+            timestamp: 错误时间戳
+            message: 错误消息
+            app_package: 应用包名（用于过滤堆栈）
+        """
         lines = message.split("\\n")
-        if not lines:
-            return details
         
         # 第一行通常包含错误类型和消息
-        first_line = lines[0]
-        error_match = re.match(r"(\w+(?:\.\w+)*(?:Exception|Error)):?\s*(.*)", first_line)
-        if error_match:
-            details["error_type"] = error_match.group(1)
-            details["error_message"] = error_match.group(2)
+        error_type, error_message, defect_type = _classify_first_line(lines[0])
+        batch.add_error(timestamp, message, error_type, error_message, defect_type)
         
         # 提取堆栈跟踪
-        stack_trace = []
-        app_stack_trace = []
         for line in lines:
-            line = line.strip()
-            if line.startswith("at "):
-                stack_trace.append(line)
-                # 如果指定了应用包名，只保留应用包下的堆栈
-                if app_package and app_package in line:
-                    app_stack_trace.append(line)
+            self._append_error_line(batch, line, app_package)
+    
+    def _append_error_line(self, batch: "ErrorBatch", line: str, app_package: Optional[str]) -> None:
+        """
+        将错误后续行（堆栈、Caused by 等）增量合并到 batch 中的最后一条错误
         
-        details["stack_trace"] = stack_trace
-        details["app_stack_trace"] = app_stack_trace
+        Args:
+            batch: 错误列式存储（原地更新）
+            line: 错误后续行
+            app_package: 应用包名（用于过滤堆栈）
+        """
+        line = line.strip()
+        # 首行未识别时，继续从异常行（如 Caused by）中识别缺陷类型
+        if batch.defect_types[-1] is None and (
+            line.startswith("Caused by:") or (("Exception" in line or "Error" in line) and _ERR_TYPE_RE.match(line))
+        ):
+            batch.defect_types[-1] = self._classify_defect(line)
+        if line.startswith("at "):
+            batch.stack_lines.append(line)
+            # 如果指定了应用包名，只保留应用包下的堆栈
+            if app_package and app_package in line:
+                batch.app_stack_indices.append(len(batch.stack_lines) - 1)
+    
+    def _append_error_block(
+        self,
+        batch: "ErrorBatch",
+        text: str,
+        start: int,
+        end: int,
+        app_package: Optional[str]
+    ) -> None:
+        """
+        将两个错误头之间的后续行（堆栈、Caused by 等）整体合并到 batch 中的最后一条错误
+        
+        与逐行调用 _append_error_line 等价，但由正则在整段文本上定位堆栈行和异常行。
         
-        return details
+        Args:
+            batch: 错误列式存储（原地更新）
+            text: 文本块
+            start: 后续行在文本块中的起始位置（行首）
+            end: 后续行在文本块中的结束位置（行首或文本末尾）
+            app_package: 应用包名（用于过滤堆栈）
+        """
+        message_length = batch.message_lengths[-1]
+        # 超过长度上限后不再追加：每追加一行消息增加 "\\n" 和该行内容
+        if message_length + (end - start) + 2 * (text.count("\n", start, end) + 1) >= MAX_ERROR_MESSAGE_LENGTH:
+            length = message_length
+            pos = start
+            while pos < end and length < MAX_ERROR_MESSAGE_LENGTH:
+                line_end = text.find("\n", pos, end)
+                line_end = end if line_end == -1 else line_end + 1
+                length += 2 + line_end - pos
+                pos = line_end
+            end = pos
+        if start >= end:
+            return
+        
+        block = text[start:end]
+        appended = "\\n" + block.replace("\n", "\n\\n")
+        batch.append_message(appended[:-2] if block.endswith("\n") else appended)
+        
+        # 首行未识别时，继续从异常行（如 Caused by）中识别缺陷类型
+        if batch.defect_types[-1] is None and any(text.find(token, start, end) != -1 for token in _EXCEPTION_LINE_TOKENS):
+            for match in _EXCEPTION_LINE_RE.finditer(text, start, end):
+                line_end = text.find("\n", match.end(), end)
+                defect_type = self._classify_defect(text[match.start():end if line_end == -1 else line_end].strip())
+                if defect_type:
+                    batch.defect_types[-1] = defect_type
+                    break
+        
+        # 去除尾部空白后只剩 "at" 的行不是堆栈行
+        frames = [frame for frame in map(str.rstrip, _STACK_FRAME_RE.findall(text, start, end)) if len(frame) > 2]
+        base = len(batch.stack_lines)
+        batch.stack_lines.extend(frames)
+        # 如果指定了应用包名，只保留应用包下的堆栈
+        if app_package:
+            batch.app_stack_indices.extend([base + i for i, frame in enumerate(frames) if app_package in frame])
     
-    def _analyze_error_logs(self, log_lines: List[str]) -> Dict[str, Any]:
+    def _analyze_error_logs(self, chunks: Iterable[str]) -> Dict[str, Any]:
         """
         分析错误日志
         
+        按块定位 ERROR 日志头（见 _iter_log_headers），两个日志头之间的文本整体作为前一个错误的后续行处理，
+        避免逐行解析的解释器开销。
+        
         Args:
-            log_lines: 日志行列表
+            chunks: 由完整日志行组成的文本块（逐行的日志列表同样适用）
         
         Returns:
             分析结果
         """
-        errors = []
-        current_error = None
+        batch = ErrorBatch()
         
-        for line in log_lines:
-            log_entry = self._parse_log_entry(line)
-            
-            if log_entry and log_entry["level"] == "ERROR":
-                # 如果已有错误，先保存
-                if current_error:
-                    errors.append(current_error)
-                
-                # 新错误
-                current_error = {
-                    "timestamp": log_entry["timestamp"],
-                    "message": log_entry["message"],
-                    "details": self._extract_error_details(log_entry["message"], self.app_package)
-                }
-            elif current_error:
-                # 追加堆栈信息
-                current_error["message"] += "\\n" + line
-                current_error["details"] = self._extract_error_details(current_error["message"], self.app_package)
-        
-        # 保存最后一个错误
-        if current_error:
-            errors.append(current_error)
+        for text in chunks:
+            pos = 0
+            for match in _iter_log_headers(text, "ERROR", _ERROR_HEADER_RE):
+                if len(batch):
+                    self._append_error_block(batch, text, pos, match.start(), self.app_package)
+                self._extract_error_details(batch, match.group(1), match.group(2), self.app_package)
+                line_end = text.find("\n", match.end())
+                pos = len(text) if line_end == -1 else line_end + 1
+            if len(batch):
+                self._append_error_block(batch, text, pos, len(text), self.app_package)
         
         return {
-            "error_count": len(errors),
-            "errors": errors
+            "error_count": len(batch),
+            "errors": batch.to_list_of_dicts(),
+            "error_type_counts": dict(Counter(t for t in batch.error_types if t))
         }
     
-    def _analyze_warn_logs(self, log_lines: List[str]) -> Dict[str, Any]:
+    def _analyze_warn_logs(self, chunks: Iterable[str]) -> Dict[str, Any]:
         """
         分析警告日志
         
+        按块定位 WARN 日志头，其余行不再逐行进入解释器处理。
+        
         Args:
-            log_lines: 日志行列表
+            chunks: 由完整日志行组成的文本块（逐行的日志列表同样适用）
         
         Returns:
             分析结果
         """
         warnings = []
         
-        for line in log_lines:
-            log_entry = self._parse_log_entry(line)
-            
-            if log_entry and log_entry["level"] == "WARN":
+        for text in chunks:
+            for match in _iter_log_headers(text, "WARN", _WARN_HEADER_RE):
                 warnings.append({
-                    "timestamp": log_entry["timestamp"],
-                    "message": log_entry["message"]
+                    "timestamp": match.group(1),
+                    "message": match.group(2)
                 })
         
         return {
@@ -383,22 +867,43 @@ class LogAnalyzer:
             "warnings": warnings
         }
     
-    def _search_logs(self, log_lines: List[str], keyword: str) -> Dict[str, Any]:
+    def _search_logs(
+        self,
+        log_lines: Iterable[str],
+        keyword: str,
+        case_insensitive: bool = False,
+        max_matches: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         搜索日志中的关键词
         
         Args:
-            log_lines: 日志行列表
+            log_lines: 日志行（列表或文件对象等可迭代对象）
             keyword: 关键词
+            case_insensitive: 是否忽略大小写
+            max_matches: 最多返回的匹配行数，达到后立即停止搜索，为 None 时不限制，小于等于 0 时不搜索
         
         Returns:
             搜索结果
         """
         matches = []
+        if max_matches is not None and max_matches <= 0:
+            return {"keyword": keyword, "match_count": 0, "matches": matches}
         
-        for line in log_lines:
-            if keyword in line:
-                matches.append(line)
+        if case_insensitive:
+            # 每次调用只编译一次，避免逐行生成小写副本
+            search = re.compile(re.escape(keyword), re.IGNORECASE).search
+            for line in log_lines:
+                if search(line):
+                    matches.append(line)
+                    if max_matches is not None and len(matches) >= max_matches:
+                        break
+        else:
+            for line in log_lines:
+                if keyword in line:
+                    matches.append(line)
+                    if max_matches is not None and len(matches) >= max_matches:
+                        break
         
         return {
             "keyword": keyword,
@@ -406,12 +911,97 @@ class LogAnalyzer:
             "matches": matches
         }
     
-    def analyze(self) -> Dict[str, Any]:
+    def _search_log_file(
+        self,
+        f: BinaryIO,
+        keyword: str,
+        case_insensitive: bool = False,
+        max_matches: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
-        分析日志
+        按块搜索整个日志文件中的关键词
+        
+        直接在字节块上查找关键词，只对命中的行做切片和解码，
+        避免逐行迭代的解释器开销。忽略大小写时每块只转一次小写，
+        在小写副本中查找，从原始块中截取命中的行。
+        注：不使用 mmap，正在写入的日志被截断时访问映射页会触发 SIGBUS。
+        
+        Args:
+            f: 以二进制模式打开的日志文件
+            keyword: 关键词
+            case_insensitive: 是否忽略大小写（字节模式下仅对 ASCII 字符生效）
+            max_matches: 最多返回的匹配行数，达到后不再读取剩余内容，为 None 时不限制，小于等于 0 时不读取文件
         
         Returns:
-            分析结果
+            搜索结果（格式同 _search_logs）
+        """
+        needle = keyword.encode("utf-8")
+        if case_insensitive:
+            needle = needle.lower()
+        matches = []
+        if max_matches is not None and max_matches <= 0:
+            return {"keyword": keyword, "match_count": 0, "matches": matches}
+        
+        for buf in self._iter_chunks(f):
+            # bytes.lower() 只折叠 ASCII 且不改变长度，偏移量可直接用于原始块
+            haystack = buf.lower() if case_insensitive else buf
+            pos = 0
+            size = len(buf)
+            while pos < size:
+                hit = haystack.find(needle, pos)
+                if hit == -1:
+                    break
+                line_start = buf.rfind(b"\n", 0, hit) + 1
+                line_end = buf.find(b"\n", hit + len(needle))
+                line_end = size if line_end == -1 else line_end + 1
+                raw_line = buf[line_start:line_end]
+                if raw_line.endswith(b"\r\n"):
+                    raw_line = raw_line[:-2] + b"\n"
+                matches.append(raw_line.decode("utf-8", errors="ignore"))
+                if max_matches is not None and len(matches) >= max_matches:
+                    break
+                pos = line_end
+            if max_matches is not None and len(matches) >= max_matches:
+                break
+        
+        return {
+            "keyword": keyword,
+            "match_count": len(matches),
+            "matches": matches
+        }
+    
+    def _scan_file(self, log_path: str, label: str, scan: Callable[[BinaryIO], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        打开日志文件并执行扫描
+        
+        Args:
+            log_path: 日志文件路径
+            label: 日志类型名称（用于错误提示）
+            scan: 扫描函数，接收以二进制模式打开的日志文件
+        
+        Returns:
+            扫描结果，文件不存在时返回错误信息
+        """
+        try:
+            with open(log_path, 'rb') as f:
+                return scan(f)
+        except FileNotFoundError:
+            return {"error": f"{label}日志文件不存在: {log_path}"}
+    
+    def _scan_logs(
+        self,
+        error_scan: Callable[[BinaryIO], Dict[str, Any]],
+        warn_scan: Callable[[BinaryIO], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        并发扫描错误日志和警告日志（读取以 IO 为主，线程间可重叠等待）
+        
+        Args:
+            error_scan: 错误日志扫描函数
+            warn_scan: 警告日志扫描函数
+        
+        Returns:
+            包含 error_logs 和 warn_logs 的结果
         """
         results = {
             "timestamp": datetime.now().isoformat(),
@@ -419,61 +1009,57 @@ class LogAnalyzer:
             "log_path": self.log_path,
         }
         
-        # 分析错误日志
-        error_log_path = self._get_log_file_path("error")
-        if os.path.exists(error_log_path):
-            with open(error_log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                log_lines = f.readlines()
-                results["error_logs"] = self._analyze_error_logs(log_lines)
-        else:
-            results["error_logs"] = {"error": f"错误日志文件不存在: {error_log_path}"}
-        
-        # 分析警告日志
-        warn_log_path = self._get_log_file_path("warn")
-        if os.path.exists(warn_log_path):
-            with open(warn_log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                log_lines = f.readlines()
-                results["warn_logs"] = self._analyze_warn_logs(log_lines)
-        else:
-            results["warn_logs"] = {"error": f"警告日志文件不存在: {warn_log_path}"}
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            error_future = executor.submit(self._scan_file, self._get_log_file_path("error"), "错误", error_scan)
+            warn_future = executor.submit(self._scan_file, self._get_log_file_path("warn"), "警告", warn_scan)
+            results["error_logs"] = error_future.result()
+            results["warn_logs"] = warn_future.result()
         
         return results
     
-    def search_logs(self, keyword: str) -> Dict[str, Any]:
+    def analyze(self, max_lines: Optional[int] = None) -> Dict[str, Any]:
+        """
+        分析日志
+        
+        Args:
+            max_lines: 每个日志文件最多分析的行数（取文件末尾的最新日志），为 None 时分析整个文件，小于等于 0 时不分析任何行
+        
+        Returns:
+            分析结果
+        """
+        return self._scan_logs(
+            lambda f: self._analyze_error_logs(self._read_text(f, max_lines)),
+            lambda f: self._analyze_warn_logs(self._read_text(f, max_lines)),
+        )
+    
+    def search_logs(
+        self,
+        keyword: str,
+        max_lines: Optional[int] = None,
+        case_insensitive: bool = False,
+        max_matches: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         搜索日志
         
         Args:
             keyword: 关键词
+            max_lines: 每个日志文件最多搜索的行数（取文件末尾的最新日志），为 None 时搜索整个文件，小于等于 0 时不搜索任何行
+            case_insensitive: 是否忽略大小写
+            max_matches: 每个日志文件最多返回的匹配行数，达到后停止搜索该文件，为 None 时不限制，小于等于 0 时不返回任何匹配行
         
         Returns:
             搜索结果
         """
-        results = {
-            "timestamp": datetime.now().isoformat(),
-            "app_name": self.app_name,
-            "log_path": self.log_path,
-        }
+        # 按字节块搜索只能对 ASCII 做大小写折叠，非 ASCII 关键词忽略大小写时按行搜索
+        line_mode = max_lines is not None or (case_insensitive and not keyword.isascii())
         
-        # 搜索错误日志
-        error_log_path = self._get_log_file_path("error")
-        if os.path.exists(error_log_path):
-            with open(error_log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                log_lines = f.readlines()
-                results["error_logs"] = self._search_logs(log_lines, keyword)
-        else:
-            results["error_logs"] = {"error": f"错误日志文件不存在: {error_log_path}"}
-        
-        # 搜索警告日志
-        warn_log_path = self._get_log_file_path("warn")
-        if os.path.exists(warn_log_path):
-            with open(warn_log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                log_lines = f.readlines()
-                results["warn_logs"] = self._search_logs(log_lines, keyword)
-        else:
-            results["warn_logs"] = {"error": f"警告日志文件不存在: {warn_log_path}"}
+        def search(f: BinaryIO) -> Dict[str, Any]:
+            if line_mode:
+                return self._search_logs(self._read_lines(f, max_lines), keyword, case_insensitive, max_matches)
+            return self._search_log_file(f, keyword, case_insensitive, max_matches)
         
-        return results
+        return self._scan_logs(search, search)
     
     def get_logback_config(self) -> Dict[str, Any]:
         """
@@ -482,7 +1068,7 @@ class LogAnalyzer:
         Returns:
             配置信息
         """
-        return self.config
+        return dict(self.config)
     
     def auto_fix_defect(self, error_type: str, error_message: str) -> Dict[str, Any]:
         """
@@ -495,29 +1081,59 @@ class LogAnalyzer:
         Returns:
             修复建议
         """
-        # 这里只是示例，实际实现需要根据具体业务逻辑
-        suggestions = [
-            "检查配置文件中的参数设置",
-            "确认数据库连接是否正常",
-            "查看相关服务是否启动",
-            "检查代码逻辑是否存在空指针"
-        ]
-        
         return {
             "error_type": error_type,
             "error_message": error_message,
-            "suggestions": suggestions
+            "defect_type": self._classify_defect(f"{error_type} {error_message}"),
+            "suggestions": list(FIX_SUGGESTIONS)
         }
 
 
+@lru_cache(maxsize=8)
+def _build_analyzer(
+    logback_config_path: str,
+    error_log_path: Optional[str],
+    warn_log_path: Optional[str],
+    all_log_path: Optional[str],
+    config_mtime: Optional[float],
+    app_name_env: Optional[str],
+    cwd: Optional[str],
+) -> LogAnalyzer:
+    # 后三个参数仅作为缓存键：配置文件变更、应用名环境变量或工作目录变化后生成新的实例
+    return LogAnalyzer(logback_config_path, error_log_path, warn_log_path, all_log_path)
+
+
+def _get_analyzer(
+    logback_config_path: Optional[str] = None,
+    error_log_path: Optional[str] = None,
+    warn_log_path: Optional[str] = None,
+    all_log_path: Optional[str] = None,
+) -> LogAnalyzer:
+    """
+    获取日志分析器（相同参数复用同一实例，logback 配置文件、应用名环境变量或工作目录变化后重新创建）
+    """
+    if logback_config_path is None:
+        logback_config_path = DEFAULT_LOGBACK_CONFIG
+    return _build_analyzer(
+        logback_config_path,
+        error_log_path,
+        warn_log_path,
+        all_log_path,
+        _get_mtime(logback_config_path),
+        os.getenv("SPRING_APPLICATION_NAME") or os.getenv("APP_NAME"),
+        _get_cwd(),
+    )
+
+
 def analyze_logs(
     logback_config_path: Optional[str] = None,
     error_log_path: Optional[str] = None,
     warn_log_path: Optional[str] = None,
     all_log_path: Optional[str] = None,
+    max_lines: Optional[int] = None,
 ) -> Dict[str, Any]:
-    analyzer = LogAnalyzer(logback_config_path, error_log_path, warn_log_path, all_log_path)
-    return analyzer.analyze()
+    analyzer = _get_analyzer(logback_config_path, error_log_path, warn_log_path, all_log_path)
+    return analyzer.analyze(max_lines)
 
 
 def search_logs(
@@ -526,18 +1142,21 @@ def search_logs(
     error_log_path: Optional[str] = None,
     warn_log_path: Optional[str] = None,
     all_log_path: Optional[str] = None,
+    max_lines: Optional[int] = None,
+    case_insensitive: bool = False,
+    max_matches: Optional[int] = None,
 ) -> Dict[str, Any]:
-    analyzer = LogAnalyzer(logback_config_path, error_log_path, warn_log_path, all_log_path)
-    return analyzer.search_logs(keyword)
+    analyzer = _get_analyzer(logback_config_path, error_log_path, warn_log_path, all_log_path)
+    return analyzer.search_logs(keyword, max_lines, case_insensitive, max_matches)
 
 
 def get_logback_config(logback_config_path: Optional[str] = None) -> Dict[str, Any]:
-    analyzer = LogAnalyzer(logback_config_path)
+    analyzer = _get_analyzer(logback_config_path)
     return analyzer.get_logback_config()
 
 
 def auto_fix_defect(error_type: str, error_message: str) -> Dict[str, Any]:
-    analyzer = LogAnalyzer()
+    analyzer = _get_analyzer()
     return analyzer.auto_fix_defect(error_type, error_message)
 
 
@@ -550,8 +1169,9 @@ if FASTMCP_AVAILABLE:
         error_log_path: Optional[str] = None,
         warn_log_path: Optional[str] = None,
         all_log_path: Optional[str] = None,
+        max_lines: Optional[int] = None,
     ) -> Dict[str, Any]:
-        return analyze_logs(logback_config_path, error_log_path, warn_log_path, all_log_path)
+        return analyze_logs(logback_config_path, error_log_path, warn_log_path, all_log_path, max_lines)
 
     @mcp.tool()
     def search_logs_tool(
@@ -560,8 +1180,20 @@ if FASTMCP_AVAILABLE:
         error_log_path: Optional[str] = None,
         warn_log_path: Optional[str] = None,
         all_log_path: Optional[str] = None,
+        max_lines: Optional[int] = None,
+        case_insensitive: bool = False,
+        max_matches: Optional[int] = None,
     ) -> Dict[str, Any]:
-        return search_logs(keyword, logback_config_path, error_log_path, warn_log_path, all_log_path)
+        return search_logs(
+            keyword,
+            logback_config_path,
+            error_log_path,
+            warn_log_path,
+            all_log_path,
+            max_lines,
+            case_insensitive,
+            max_matches,
+        )
 
     @mcp.tool()
     def get_logback_config_tool(logback_config_path: Optional[str] = None) -> Dict[str, Any]:
@@ -573,15 +1205,17 @@ if FASTMCP_AVAILABLE:
 
 
 def main() -> None:
+    # 诊断信息输出到 stderr，stdout 留给 MCP stdio 传输
+    logging.basicConfig(stream=sys.stderr, format="%(message)s")
     if FastMCP is None:
-        print("错误: 未安装 fastmcp 库")
-        print("请运行: pip install fastmcp")
+        logger.error("错误: 未安装 fastmcp 库")
+        logger.error("请运行: pip install fastmcp")
         return
 
     try:
         mcp.run()
-    except Exception as exc:
-        print(f"运行 FastMCP 服务器时出错: {exc}")
+    except Exception:
+        logger.exception("运行 FastMCP 服务器时出错")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC))
+
+import mcp_services  # noqa: E402
+
+# Every package in this repo ships its own copy of the mcp_services package; when the
+# whole repo is tested in one session, let the first one imported find this subpackage too.
+if str(SRC / "mcp_services") not in mcp_services.__path__:
+    mcp_services.__path__.append(str(SRC / "mcp_services"))
@@ -0,0 +1,289 @@
+import io
+import random
+import re
+
+import pytest
+
+from mcp_services.log_analyzer import tool
+from mcp_services.log_analyzer.tool import LogAnalyzer
+
+# Line-by-line parser of the original implementation, used as the reference
+# for the chunked header scan, the tail reader and the columnar error batches.
+_REFERENCE_LINE_RE = re.compile(
+    r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})\s+(\w+)\s+\S+\s+app_id:(\S+)\s+---\s+\[(.*?)\]\s+(.+?)\s+:\s+(.*)"
+)
+
+SAMPLE_ERROR_LOG = (
+    "2024-01-02 10:00:00.001 INFO 1 app_id:demo --- [main] com.demo.App : started\n"
+    "2024-01-02 10:00:01.123 ERROR 1 app_id:demo --- [http-1] com.demo.web.OrderController : 下单失败\n"
+    "java.lang.NullPointerException: order is null\n"
+    "\tat com.demo.service.OrderService.create(OrderService.java:42)\n"
+    "\tat org.springframework.web.Servlet.service(Servlet.java:10)\n"
+    "Caused by: java.lang.IllegalStateException: bad state\n"
+    "\tat com.demo.repo.OrderRepo.save(OrderRepo.java:7)\n"
+    "2024-01-02 10:00:02.456 WARN 1 app_id:demo --- [main] com.demo.App : slow\n"
+    "2024-01-02 10:00:03.789 ERROR 1 app_id:demo --- [job-1] com.demo.job.SyncJob : java.sql.SQLException: timeout\n"
+)
+
+SAMPLE_WARN_LOG = (
+    "2024-01-02 10:00:02.456 WARN 1 app_id:demo --- [main] com.demo.App : slow query\n"
+    "2024-01-02 10:00:02.500 INFO 1 app_id:demo --- [main] com.demo.App : fine\n"
+    "2024-01-02 10:00:04.000 WARN 1 app_id:demo --- [pool-2] com.demo.Cache : cache miss\n"
+)
+
+
+def reference_errors(lines, limit):
+    errors = []
+    for line in lines:
+        match = _REFERENCE_LINE_RE.match(line)
+        if match and match.group(2) == "ERROR":
+            errors.append({"timestamp": match.group(1), "message": match.group(6)})
+        elif errors and len(errors[-1]["message"]) < limit:
+            errors[-1]["message"] += "\\n" + line
+    return errors
+
+
+def reference_warnings(lines):
+    warnings = []
+    for line in lines:
+        match = _REFERENCE_LINE_RE.match(line)
+        if match and match.group(2) == "WARN":
+            warnings.append({"timestamp": match.group(1), "message": match.group(6)})
+    return warnings
+
+
+def random_log(seed, lines=400):
+    rng = random.Random(seed)
+    out = []
+    for i in range(lines):
+        kind = rng.random()
+        ts = f"2024-01-02 10:{i // 60 % 60:02d}:{i % 60:02d}.{rng.randrange(1000):03d}"
+        if kind < 0.25:
+            level = rng.choice(["ERROR", "WARN", "INFO", "DEBUG"])
+            message = rng.choice(["boom", "java.io.IOException: disk", "数据库连接失败", "", "a : b"])
+            out.append(f"{ts} {level} {i} app_id:demo --- [t-{i}] com.demo.C{i} : {message}")
+        elif kind < 0.55:
+            out.append(f"{' ' * rng.randrange(3)}\tat com.{rng.choice(['demo', 'lib'])}.X.m(X.java:{i})")
+        elif kind < 0.65:
+            out.append(rng.choice(["Caused by: java.lang.RuntimeException: x", "java.lang.IllegalStateException"]))
+        elif kind < 0.75:
+            out.append(f"noise ERROR {ts} app_id:x --- [y] z : not a header")
+        elif kind < 0.8:
+            out.append("")
+        else:
+            out.append("x" * rng.randrange(1, 300))
+    ending = "\n" if seed % 2 else ""
+    return "\n".join(out) + ending
+
+
+def write_log(path, text, newline="\n"):
+    path.write_bytes(text.replace("\n", newline).encode("utf-8"))
+    return str(path)
+
+
+def analyze(error_path, warn_path, max_lines=None):
+    result = LogAnalyzer(error_log_path=error_path, warn_log_path=warn_path).analyze(max_lines)
+    result.pop("timestamp")
+    return result
+
+
+def summary(result):
+    errors = [{"timestamp": e["timestamp"], "message": e["message"]} for e in result["error_logs"]["errors"]]
+    return errors, result["warn_logs"]["warnings"]
+
+
+def test_analyze_sample_logs(tmp_path):
+    result = analyze(
+        write_log(tmp_path / "error.log", SAMPLE_ERROR_LOG), write_log(tmp_path / "warn.log", SAMPLE_WARN_LOG)
+    )
+    errors = result["error_logs"]["errors"]
+    assert result["error_logs"]["error_count"] == 2
+    assert errors[0]["timestamp"] == "2024-01-02 10:00:01.123"
+    assert errors[0]["message"].startswith("下单失败\\njava.lang.NullPointerException: order is null\n")
+    assert errors[0]["details"]["stack_trace"] == [
+        "at com.demo.service.OrderService.create(OrderService.java:42)",
+        "at org.springframework.web.Servlet.service(Servlet.java:10)",
+        "at com.demo.repo.OrderRepo.save(OrderRepo.java:7)",
+    ]
+    assert errors[0]["details"]["defect_type"] == "空指针异常"
+    assert errors[1]["details"]["error_type"] == "java.sql.SQLException"
+    assert errors[1]["details"]["error_message"] == "timeout"
+    assert result["warn_logs"]["warnings"] == [
+        {"timestamp": "2024-01-02 10:00:02.456", "message": "slow query"},
+        {"timestamp": "2024-01-02 10:00:04.000", "message": "cache miss"},
+    ]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_analyze_matches_line_reference(tmp_path, seed):
+    text = random_log(seed)
+    path = write_log(tmp_path / "app.log", text)
+    lines = text.splitlines(keepends=True)
+    errors, warnings = summary(analyze(path, path))
+    assert errors == reference_errors(lines, tool.MAX_ERROR_MESSAGE_LENGTH)
+    assert warnings == reference_warnings(lines)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 251, 4096])
+def test_headers_split_across_chunks(tmp_path, monkeypatch, chunk_size):
+    text = random_log(7) + SAMPLE_ERROR_LOG
+    path = write_log(tmp_path / "app.log", text)
+    lines = text.splitlines(keepends=True)
+    expected = analyze(path, path)
+    monkeypatch.setattr(tool, "SEARCH_CHUNK_SIZE", chunk_size)
+    assert analyze(path, path) == expected
+    for keyword in ("ERROR", "at com.demo", "数据库"):
+        result = LogAnalyzer(error_log_path=path, warn_log_path=path).search_logs(keyword)["error_logs"]
+        assert result["matches"] == [line for line in lines if keyword in line]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_crlf_logs_match_lf_logs(tmp_path, seed):
+    text = random_log(seed) + SAMPLE_ERROR_LOG
+    lf = write_log(tmp_path / "lf.log", text)
+    crlf = write_log(tmp_path / "crlf.log", text, "\r\n")
+    for max_lines in (None, 50):
+        assert summary(analyze(crlf, crlf, max_lines)) == summary(analyze(lf, lf, max_lines))
+    lf_search = LogAnalyzer(error_log_path=lf, warn_log_path=lf).search_logs("at com.demo")
+    crlf_search = LogAnalyzer(error_log_path=crlf, warn_log_path=crlf).search_logs("at com.demo")
+    assert crlf_search["error_logs"] == lf_search["error_logs"]
+
+
+@pytest.mark.parametrize("max_lines", [1, 2, 9, 37, 400, 10000])
+def test_tail_mode_reads_last_lines(tmp_path, monkeypatch, max_lines):
+    monkeypatch.setattr(tool, "TAIL_BLOCK_SIZE", 97)
+    text = random_log(3)
+    path = write_log(tmp_path / "app.log", text)
+    lines = text.splitlines(keepends=True)[-max_lines:]
+    errors, warnings = summary(analyze(path, path, max_lines))
+    assert errors == reference_errors(lines, tool.MAX_ERROR_MESSAGE_LENGTH)
+    assert warnings == reference_warnings(lines)
+    search = LogAnalyzer(error_log_path=path, warn_log_path=path).search_logs("app_id", max_lines)
+    assert search["error_logs"]["matches"] == [line for line in lines if "app_id" in line]
+
+
+@pytest.mark.parametrize("max_lines", [0, -1])
+def test_non_positive_max_lines_reads_nothing(tmp_path, max_lines):
+    path = write_log(tmp_path / "app.log", SAMPLE_ERROR_LOG)
+    assert summary(analyze(path, path, max_lines)) == ([], [])
+    search = LogAnalyzer(error_log_path=path, warn_log_path=path).search_logs("ERROR", max_lines)
+    assert search["error_logs"]["matches"] == []
+
+
+@pytest.mark.parametrize("limit", [40, 200, 1000])
+def test_long_error_messages_are_capped(tmp_path, monkeypatch, limit):
+    monkeypatch.setattr(tool, "MAX_ERROR_MESSAGE_LENGTH", limit)
+    text = SAMPLE_ERROR_LOG + "\n".join(f"\tat com.demo.Deep.m{i}(Deep.java:{i})" for i in range(200)) + "\n"
+    path = write_log(tmp_path / "app.log", text)
+    errors, _ = summary(analyze(path, path))
+    assert errors == reference_errors(text.splitlines(keepends=True), limit)
+    assert len(errors[-1]["message"]) < limit + 100
+
+
+def test_cached_analyzer_follows_app_name_env_and_cwd(tmp_path, monkeypatch):
+    config = str(tmp_path / "missing-logback.xml")
+    monkeypatch.delenv("SPRING_APPLICATION_NAME", raising=False)
+    monkeypatch.setenv("APP_NAME", "order-service")
+    first = tool._get_analyzer(config)
+    assert tool._get_analyzer(config) is first
+    assert first.app_name == "order-service"
+    monkeypatch.setenv("APP_NAME", "pay-service")
+    assert tool._get_analyzer(config).app_name == "pay-service"
+    monkeypatch.delenv("APP_NAME")
+    for name in ("alpha", "beta"):
+        (tmp_path / name).mkdir()
+        monkeypatch.chdir(tmp_path / name)
+        assert tool._get_analyzer(config).app_name == name
+
+
+def test_search_case_sensitivity_and_limits(tmp_path):
+    text = "Alpha ERROR one\nalpha error two\n数据库连接失败 ALPHA\n数据库 other\nlast Alpha"
+    path = write_log(tmp_path / "app.log", text, "\r\n")
+    analyzer = LogAnalyzer(error_log_path=path, warn_log_path=path)
+
+    def matches(*args):
+        return analyzer.search_logs(*args)["error_logs"]["matches"]
+
+    assert matches("Alpha") == ["Alpha ERROR one\n", "last Alpha"]
+    assert matches("alpha", None, True) == ["Alpha ERROR one\n", "alpha error two\n", "数据库连接失败 ALPHA\n", "last Alpha"]
+    assert matches("数据库", None, True) == ["数据库连接失败 ALPHA\n", "数据库 other\n"]
+    assert matches("alpha", 3, True) == ["数据库连接失败 ALPHA\n", "last Alpha"]
+    assert matches("alpha", None, True, 2) == ["Alpha ERROR one\n", "alpha error two\n"]
+    assert matches("alpha", 3, True, 1) == ["数据库连接失败 ALPHA\n"]
+    for limit in (0, -1):
+        result = analyzer.search_logs("alpha", None, True, limit)["error_logs"]
+        assert result == {"keyword": "alpha", "match_count": 0, "matches": []}
+
+
+def test_logback_config_parse_stops_early_and_closes_file(tmp_path, monkeypatch):
+    config = tmp_path / "logback.xml"
+    config.write_text(
+        "<configuration>"
+        '<property name="logging.path" value="/data/logs"/>'
+        '<property name="spring.application.name" value="order-service"/>'
+        '<appender name="error-file"><file>/data/logs/error.log</file></appender>'
+        '<appender name="warn-file"><file>/data/logs/warn.log</file></appender>'
+        '<appender name="file"><file>/data/logs/all.log</file></appender>'
+        '<property name="logging.path" value="/ignored"/>'
+        "</configuration>",
+        encoding="utf-8",
+    )
+    opened = []
+    real_open = open
+
+    def tracking_open(*args, **kwargs):
+        fh = real_open(*args, **kwargs)
+        opened.append(fh)
+        return fh
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    parsed = tool._parse_logback_config_cached.__wrapped__(str(config), None)
+    monkeypatch.undo()
+    assert parsed == {
+        "log_path": "/data/logs",
+        "app_name": "order-service",
+        "error_log_path": "/data/logs/error.log",
+        "warn_log_path": "/data/logs/warn.log",
+        "all_log_path": "/data/logs/all.log",
+    }
+    assert opened and all(fh.closed for fh in opened)
+
+
+def test_file_truncated_during_scan(tmp_path):
+    # copytruncate shrinking a live log mid-scan must only shorten the result.
+    path = tmp_path / "app.log"
+    write_log(path, random_log(5, lines=5000))
+    analyzer = LogAnalyzer(error_log_path=str(path), warn_log_path=str(path))
+    with open(path, "rb") as f:
+        lines = analyzer._iter_log_lines(f)
+        first = next(lines)
+        with open(path, "r+b") as writer:
+            writer.truncate(10)
+        rest = list(lines)
+        assert not f.closed
+    assert first
+    # At most what the file object had already buffered before the truncation.
+    assert sum(len(line) for line in rest) <= 2 * io.DEFAULT_BUFFER_SIZE
+    with open(path, "rb") as f:
+        assert analyzer._search_log_file(f, "a")["match_count"] <= 1
+
+
+def test_missing_log_file_is_reported(tmp_path):
+    missing = str(tmp_path / "missing.log")
+    result = LogAnalyzer(error_log_path=missing, warn_log_path=missing).search_logs("x")
+    assert result["error_logs"] == {"error": f"错误日志文件不存在: {missing}"}
+    assert result["warn_logs"] == {"error": f"警告日志文件不存在: {missing}"}
+    result = LogAnalyzer(error_log_path=missing, warn_log_path=missing).analyze()
+    assert result["error_logs"] == {"error": f"错误日志文件不存在: {missing}"}
+
+
+def test_diagnostics_stay_off_stdout(tmp_path, monkeypatch, capsys, caplog):
+    config = tmp_path / "logback-spring.xml"
+    config.write_text("<configuration>", encoding="utf-8")
+    assert tool._parse_logback_config_cached.__wrapped__(str(config), None) == {}
+
+    monkeypatch.setattr(tool, "FastMCP", None)
+    tool.main()
+    assert capsys.readouterr().out == ""
+    assert "解析 logback 配置文件时出错" in caplog.text
+    assert "未安装 fastmcp" in caplog.text
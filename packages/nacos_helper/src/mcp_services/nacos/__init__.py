@@ -2,19 +2,7 @@
 Nacos 配置与服务状态 MCP 服务
 """
 
-from .tool import (
-    NacosClient,
-    get_config,
-    get_configs,
-    get_latest_history,
-    list_config_history,
-    get_config_history_detail,
-    compare_latest_history,
-    compare_config_history,
-    list_instances,
-    check_service_registration,
-    collect_service_context,
-)
+from importlib import import_module
 
 __all__ = [
     "NacosClient",
@@ -29,3 +17,12 @@ __all__ = [
     "check_service_registration",
     "collect_service_context",
 ]
+
+
+def __getattr__(name):
+    # 首次访问时才导入 tool 模块（PEP 562），避免仅导入包时加载 fastmcp 等依赖
+    if name in __all__:
+        value = getattr(import_module(".tool", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,16 +7,21 @@ Nacos 配置与服务状态工具（兼容 Nacos 2.4.x）
 
 from __future__ import annotations
 
+import atexit
+import hashlib
 import json
+import logging
 import os
 import sys
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
 from difflib import unified_diff
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from urllib.error import HTTPError, URLError
-from urllib.parse import urlencode
-from urllib.request import Request, urlopen
+from urllib.parse import unquote, urlencode, urlsplit
+from urllib.request import Request, getproxies, proxy_bypass, urlopen
 
 
 DEFAULT_SERVER_ADDR = os.getenv("NACOS_SERVER_ADDR", "http://127.0.0.1:8848")
@@ -26,13 +31,35 @@ DEFAULT_USERNAME = os.getenv("NACOS_USERNAME")
 DEFAULT_PASSWORD = os.getenv("NACOS_PASSWORD")
 DEFAULT_TIMEOUT = float(os.getenv("NACOS_TIMEOUT", "5"))
 DEFAULT_DATA_IDS = os.getenv("NACOS_DATA_IDS", "")
+_DEFAULT_DATA_IDS_LIST = tuple(item.strip() for item in DEFAULT_DATA_IDS.split(",") if item.strip())
+
+# History list endpoints with the namespace parameter each API version expects.
+_HISTORY_LIST_ENDPOINTS: Tuple[Tuple[str, str], ...] = (
+    ("/nacos/v1/cs/history/list", "tenant"),
+    ("/nacos/v1/cs/history", "tenant"),
+    ("/nacos/v2/cs/history/list", "namespaceId"),
+    ("/nacos/v2/cs/history", "namespaceId"),
+)
+_HISTORY_NAMESPACE_KEYS: Dict[str, str] = dict(_HISTORY_LIST_ENDPOINTS)
+_HISTORY_DETAIL_ENDPOINTS: Tuple[str, ...] = ("/nacos/v1/cs/history", "/nacos/v2/cs/history")
 DEFAULT_REGISTRY_NAMESPACE = os.getenv("NACOS_REGISTRY_NAMESPACE")
+DEFAULT_POOL_SIZE = int(os.getenv("NACOS_POOL_SIZE", "16"))
+DEFAULT_MAX_WORKERS = int(os.getenv("NACOS_MAX_WORKERS", "8"))
+DEFAULT_CACHE_TTL = float(os.getenv("NACOS_CACHE_TTL", "0"))
+# Comma-separated tool names to expose; all tools are registered when unset.
+DEFAULT_TOOLS = os.getenv("NACOS_TOOLS")
+
+logger = logging.getLogger(__name__)
 
 
 def _configure_utf8_stdio() -> None:
     # Ensure Chinese text renders correctly in stdio transports on Windows.
     for stream in (sys.stdout, sys.stderr):
         try:
+            encoding = (getattr(stream, "encoding", None) or "").lower().replace("_", "-")
+            if encoding in ("utf-8", "utf8"):
+                # Already UTF-8 (e.g. PYTHONUTF8=1); skip the reconfigure call.
+                continue
             if stream and hasattr(stream, "reconfigure"):
                 stream.reconfigure(encoding="utf-8")
         except Exception:
@@ -46,6 +73,38 @@ except ImportError:
     FastMCP = None
     FASTMCP_AVAILABLE = False
 
+try:
+    import urllib3
+    URLLIB3_AVAILABLE = True
+    # Follow redirects like urlopen (at most 10, the last one is returned as an error);
+    # nothing else is retried, as with urlopen.
+    _RETRIES = urllib3.Retry(
+        total=None, connect=0, read=0, status=0, other=0, redirect=10, raise_on_redirect=False
+    )
+except ImportError:
+    urllib3 = None
+    URLLIB3_AVAILABLE = False
+    _RETRIES = None
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+    _loads = json.loads
+
+
+def _first(mapping: Dict[str, Any], *keys: str) -> Any:
+    # Same result as chaining mapping.get(key) with "or": first truthy value, else the last one.
+    value = None
+    for key in keys:
+        value = mapping.get(key)
+        if value:
+            return value
+    return value
+
 
 @dataclass
 class NacosAuth:
@@ -56,7 +115,79 @@ class NacosAuth:
     def is_valid(self) -> bool:
         if not self.access_token or not self.token_ttl or not self.token_create_time:
             return False
-        return (time.time() - self.token_create_time) < max(self.token_ttl - 10, 0)
+        return (time.monotonic() - self.token_create_time) < max(self.token_ttl - 10, 0)
+
+
+class NacosHTTPError(RuntimeError):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _new_pool(server_addr: str) -> Any:
+    # Same proxy selection as urlopen: *_proxy / no_proxy (or the system settings).
+    parts = urlsplit(server_addr)
+    proxy = getproxies().get(parts.scheme)
+    if not proxy or proxy_bypass(parts.netloc):
+        return urllib3.PoolManager(maxsize=DEFAULT_POOL_SIZE)
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    proxy_parts = urlsplit(proxy)
+    proxy_headers = None
+    if proxy_parts.username:
+        proxy_headers = urllib3.make_headers(
+            proxy_basic_auth=f"{unquote(proxy_parts.username)}:{unquote(proxy_parts.password or '')}"
+        )
+    return urllib3.ProxyManager(proxy, maxsize=DEFAULT_POOL_SIZE, proxy_headers=proxy_headers)
+
+
+# Keep-alive connection pools per server address, shared by every client and thread
+# (only when urllib3 is installed; otherwise each request goes through urlopen).
+_POOLS: Dict[str, Any] = {}
+_POOLS_LOCK = threading.Lock()
+
+# Access tokens shared by every client logging in with the same server and credentials
+# (keyed by a hash of the credentials, so no password is kept here).
+_AUTH_CACHE: Dict[Tuple[str, str], NacosAuth] = {}
+_AUTH_LOCK = threading.Lock()
+
+# Raw bodies of recent GET responses, keyed by server, credentials, path and params.
+_RESPONSE_CACHE: Dict[Tuple[Any, ...], Tuple[float, bytes]] = {}
+_RESPONSE_CACHE_LOCK = threading.Lock()
+_RESPONSE_CACHE_MAXSIZE = 256
+# GET requests currently on the wire, so identical concurrent calls share one response.
+# Keyed like _RESPONSE_CACHE: a follower only waits on a leader with the same credentials.
+_INFLIGHT: Dict[Tuple[Any, ...], "Future[bytes]"] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+# Last history endpoint that returned records with its own namespace key, per server and namespace.
+_HISTORY_ENDPOINT_HITS: Dict[Tuple[str, str], str] = {}
+# Last endpoint that answered _request_first_available, per server and endpoint list.
+_ENDPOINT_HITS: Dict[Tuple[str, Tuple[str, ...]], str] = {}
+
+
+def _credential_id(username: Optional[str], password: Optional[str]) -> str:
+    # Identifies the credentials in shared cache keys without keeping the password there.
+    return hashlib.sha256(f"{username or ''}\0{password or ''}".encode("utf-8")).hexdigest()
+
+
+def _get_pool(server_addr: str) -> Any:
+    if urllib3 is None:
+        return None
+    with _POOLS_LOCK:
+        pool = _POOLS.get(server_addr)
+        if pool is None:
+            pool = _POOLS[server_addr] = _new_pool(server_addr)
+        return pool
+
+
+@atexit.register
+def _close_pools() -> None:
+    # Close idle keep-alive sockets so the server sees a clean shutdown.
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    for pool in pools:
+        pool.clear()
 
 
 class NacosClient:
@@ -76,7 +207,16 @@ class NacosClient:
         self.password = password if password is not None else DEFAULT_PASSWORD
         self.namespace = namespace if namespace is not None else DEFAULT_NAMESPACE
         self.timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
-        self._auth = NacosAuth()
+        self._auth_key = (self.server_addr, _credential_id(self.username, self.password))
+        self._auth = _AUTH_CACHE.get(self._auth_key) or NacosAuth()
+        self._login_lock = threading.Lock()
+        self._pool = _get_pool(self.server_addr)
+        # The login form only depends on the credentials, so encode it once per client.
+        self._login_body: Optional[bytes] = (
+            urlencode({"username": self.username, "password": self.password}).encode("utf-8")
+            if self.username and self.password
+            else None
+        )
 
     def _request_first_available(
         self,
@@ -84,14 +224,22 @@ class NacosClient:
         endpoints: List[str],
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
-    ) -> Tuple[str, str]:
+        preferred: Optional[str] = None,
+    ) -> Tuple[bytes, str]:
+        hit_key = (self.server_addr, tuple(endpoints))
+        # Try the endpoint that answered last time first, then the caller's hint.
+        preferred = _ENDPOINT_HITS.get(hit_key, preferred)
+        if preferred in endpoints and endpoints[0] != preferred:
+            endpoints = [preferred] + [path for path in endpoints if path != preferred]
         last_error: Optional[Exception] = None
         for path in endpoints:
             try:
-                return self._request(method, path, params=params, data=data), path
+                response = self._request(method, path, params=params, data=data)
             except Exception as exc:
                 last_error = exc
                 continue
+            _ENDPOINT_HITS[hit_key] = path
+            return response, path
         raise RuntimeError(
             "Nacos 历史接口不可用，已尝试: "
             + ", ".join(endpoints)
@@ -111,41 +259,47 @@ class NacosClient:
         if not isinstance(items, list):
             items = []
         normalized: List[Dict[str, Any]] = []
+        history_items: List[Dict[str, Any]] = []
         for item in items:
             if not isinstance(item, dict):
                 continue
-            record = dict(item)
-            nid_value = record.get("nid") or record.get("id")
-            if nid_value is not None and "nid" not in record:
-                record["nid"] = nid_value
-            normalized.append(record)
+            record_id = item.get("id")
+            nid = item.get("nid")
+            if "nid" not in item and record_id is not None:
+                # Only records that lack a nid need a copy; the others are shared as-is.
+                item = dict(item)
+                item["nid"] = nid = record_id
+            normalized.append(item)
+            history_items.append(
+                {
+                    "nid": str(nid or record_id or ""),
+                    "id": str(record_id or ""),
+                    "md5": item.get("md5"),
+                    "op_type": _first(item, "opType", "op_type"),
+                    "timestamp": _first(item, "lastModifiedTime", "timestamp"),
+                    "src_ip": _first(item, "srcIp", "src_ip"),
+                }
+            )
 
         if normalized:
             payload["normalized_items"] = normalized
             if isinstance(data_section, dict) and "normalized_items" not in data_section:
                 data_section["normalized_items"] = normalized
-            payload["history_items"] = [
-                {
-                    "nid": str(entry.get("nid") or entry.get("id") or ""),
-                    "id": str(entry.get("id") or ""),
-                    "md5": entry.get("md5"),
-                    "op_type": entry.get("opType") or entry.get("op_type"),
-                    "timestamp": entry.get("lastModifiedTime") or entry.get("timestamp"),
-                    "src_ip": entry.get("srcIp") or entry.get("src_ip"),
-                }
-                for entry in normalized
-            ]
+            payload["history_items"] = history_items
         return normalized
 
     def _login(self) -> None:
-        if not self.username or not self.password:
+        if self._login_body is None:
             return
-        data = {"username": self.username, "password": self.password}
-        response = self._raw_request("POST", "/nacos/v1/auth/login", data=data)
+        req = Request(f"{self.server_addr}/nacos/v1/auth/login", data=self._login_body, method="POST")
+        req.add_header("Content-Type", "application/x-www-form-urlencoded")
+        response = self._send(req)
         try:
-            payload = json.loads(response)
-        except json.JSONDecodeError as exc:
-            raise RuntimeError(f"Nacos 登录响应解析失败: {response}") from exc
+            payload = _loads(response)
+        except ValueError as exc:
+            raise RuntimeError(
+                f"Nacos 登录响应解析失败: {response.decode('utf-8', errors='ignore')}"
+            ) from exc
 
         token = payload.get("accessToken")
         ttl = payload.get("tokenTtl")
@@ -154,8 +308,28 @@ class NacosClient:
         self._auth = NacosAuth(
             access_token=token,
             token_ttl=int(ttl) if ttl is not None else None,
-            token_create_time=time.time(),
+            token_create_time=time.monotonic(),
         )
+        with _AUTH_LOCK:
+            _AUTH_CACHE[self._auth_key] = self._auth
+
+    def _ensure_auth(self) -> None:
+        if not self.username or not self.password or self._auth.is_valid():
+            return
+        with self._login_lock:
+            # Another thread may have logged in while this one was waiting.
+            cached = _AUTH_CACHE.get(self._auth_key)
+            if cached is not None and cached.is_valid():
+                self._auth = cached
+            else:
+                self._login()
+
+    def _invalidate_auth(self, stale: NacosAuth) -> None:
+        with _AUTH_LOCK:
+            # Keep (and switch to) a token that another client already refreshed.
+            if _AUTH_CACHE.get(self._auth_key) is stale:
+                del _AUTH_CACHE[self._auth_key]
+            self._auth = _AUTH_CACHE.get(self._auth_key) or NacosAuth()
 
     def _raw_request(
         self,
@@ -163,7 +337,7 @@ class NacosClient:
         path: str,
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
-    ) -> str:
+    ) -> bytes:
         url = f"{self.server_addr}{path}"
         if method.upper() == "GET":
             if params:
@@ -182,26 +356,131 @@ class NacosClient:
         path: str,
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
-    ) -> str:
-        if self.username and self.password and not self._auth.is_valid():
-            self._login()
+        _params_owned: bool = False,
+    ) -> bytes:
+        if method.upper() != "GET":
+            return self._fetch(method, path, params, data, _params_owned)
+
+        # Responses are only shared between callers presenting the same credentials:
+        # a cached body is returned without logging in, so it must not reach anyone
+        # the server would have refused.
+        cache_key = (
+            *self._auth_key,
+            path,
+            tuple(sorted((key, str(value)) for key, value in (params or {}).items())),
+        )
+        if DEFAULT_CACHE_TTL > 0:
+            cached = _RESPONSE_CACHE.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < DEFAULT_CACHE_TTL:
+                return cached[1]
+
+        # Single-flight uses the same credential-aware key; a caller with other
+        # credentials must not pick up a response fetched with someone else's token.
+        with _INFLIGHT_LOCK:
+            future = _INFLIGHT.get(cache_key)
+            leader = future is None
+            if leader:
+                future = _INFLIGHT[cache_key] = Future()
+        if not leader:
+            return self._wait_inflight(future)
 
-        params = params.copy() if params else {}
-        if self._auth.is_valid():
-            params["accessToken"] = self._auth.access_token
+        try:
+            response = self._fetch(method, path, params, data, _params_owned)
+            if DEFAULT_CACHE_TTL > 0:
+                self._cache_response(cache_key, response)
+            future.set_result(response)
+            return response
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with _INFLIGHT_LOCK:
+                del _INFLIGHT[cache_key]
+
+    def _wait_inflight(self, future: "Future[bytes]") -> bytes:
+        # Wait no longer than a request of our own would, and raise a fresh exception:
+        # the leader's exception object is shared by every follower and the leader itself.
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError as exc:
+            raise RuntimeError(f"Nacos 请求超时: 等待相同请求的结果超过 {self.timeout} 秒") from exc
+        except NacosHTTPError as exc:
+            raise NacosHTTPError(exc.status, str(exc)) from exc
+        except Exception as exc:
+            raise RuntimeError(str(exc)) from exc
+
+    def _fetch(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        data: Optional[Dict[str, Any]],
+        params_owned: bool,
+    ) -> bytes:
+        self._ensure_auth()
+
+        # Callers that build params for this request alone let it be updated in place.
+        if not params_owned or params is None:
+            params = params.copy() if params else {}
+        auth = self._auth
+        if auth.is_valid():
+            params["accessToken"] = auth.access_token
 
+        try:
+            return self._raw_request(method, path, params=params, data=data)
+        except NacosHTTPError as exc:
+            # A shared token can be rejected before its local expiry (server restart,
+            # token secret rotation, revocation): log in again and retry once.
+            if exc.status not in (401, 403) or "accessToken" not in params:
+                raise
+        self._invalidate_auth(auth)
+        self._ensure_auth()
+        params["accessToken"] = self._auth.access_token
         return self._raw_request(method, path, params=params, data=data)
 
-    def _send(self, req: Request) -> str:
+    @staticmethod
+    def _cache_response(cache_key: Tuple[Any, ...], response: bytes) -> None:
+        now = time.monotonic()
+        with _RESPONSE_CACHE_LOCK:
+            _RESPONSE_CACHE.pop(cache_key, None)
+            _RESPONSE_CACHE[cache_key] = (now, response)
+            if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAXSIZE:
+                expired = [key for key, (stored, _) in _RESPONSE_CACHE.items() if now - stored >= DEFAULT_CACHE_TTL]
+                for key in expired:
+                    del _RESPONSE_CACHE[key]
+                while len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAXSIZE:
+                    del _RESPONSE_CACHE[next(iter(_RESPONSE_CACHE))]
+
+    def _send(self, req: Request) -> bytes:
+        if self._pool is not None:
+            return self._send_pooled(req)
         try:
             with urlopen(req, timeout=self.timeout) as resp:
-                return resp.read().decode("utf-8", errors="ignore")
+                return resp.read()
         except HTTPError as exc:
             body = exc.read().decode("utf-8", errors="ignore")
-            raise RuntimeError(f"Nacos HTTP {exc.code} {exc.reason}: {body}") from exc
+            raise NacosHTTPError(exc.code, f"Nacos HTTP {exc.code} {exc.reason}: {body}") from exc
         except URLError as exc:
             raise RuntimeError(f"Nacos 请求失败: {exc}") from exc
 
+    def _send_pooled(self, req: Request) -> bytes:
+        try:
+            resp = self._pool.request(
+                req.get_method(),
+                req.full_url,
+                body=req.data,
+                headers=dict(req.header_items()),
+                timeout=self.timeout,
+                retries=_RETRIES,
+            )
+        except urllib3.exceptions.HTTPError as exc:
+            raise RuntimeError(f"Nacos 请求失败: {exc}") from exc
+        # Anything but 2xx is an error, as it is with urlopen (including redirects not followed).
+        if not 200 <= resp.status < 300:
+            body = resp.data.decode("utf-8", errors="ignore")
+            raise NacosHTTPError(resp.status, f"Nacos HTTP {resp.status} {resp.reason}: {body}")
+        return resp.data
+
     def _namespace_param(self, namespace: Optional[str]) -> Optional[str]:
         if namespace is None:
             namespace = self.namespace
@@ -210,9 +489,7 @@ class NacosClient:
     def _parse_data_ids(self, data_ids: Optional[List[str]] = None) -> List[str]:
         if data_ids:
             return [item.strip() for item in data_ids if item and item.strip()]
-        if not DEFAULT_DATA_IDS:
-            return []
-        return [item.strip() for item in DEFAULT_DATA_IDS.split(",") if item.strip()]
+        return list(_DEFAULT_DATA_IDS_LIST)
 
     def get_config(self, data_id: str, group: Optional[str] = None, namespace: Optional[str] = None) -> Dict[str, Any]:
         group = group or DEFAULT_GROUP
@@ -220,7 +497,9 @@ class NacosClient:
         params = {"dataId": data_id, "group": group}
         if tenant:
             params["tenant"] = tenant
-        content = self._request("GET", "/nacos/v1/cs/configs", params=params)
+        content = self._request("GET", "/nacos/v1/cs/configs", params=params, _params_owned=True).decode(
+            "utf-8", errors="ignore"
+        )
         return {
             "data_id": data_id,
             "group": group,
@@ -238,9 +517,14 @@ class NacosClient:
         tenant = self._namespace_param(namespace)
         resolved_ids = self._parse_data_ids(data_ids)
         results: List[Dict[str, Any]] = []
-        for data_id in resolved_ids:
+        if resolved_ids:
+            with ThreadPoolExecutor(max_workers=min(DEFAULT_MAX_WORKERS, len(resolved_ids))) as executor:
+                futures = [executor.submit(self.get_config, data_id, group, tenant) for data_id in resolved_ids]
+        else:
+            futures = []
+        for data_id, future in zip(resolved_ids, futures):
             try:
-                results.append(self.get_config(data_id, group, tenant))
+                results.append(future.result())
             except Exception as exc:
                 results.append(
                     {
@@ -274,31 +558,30 @@ class NacosClient:
             "pageSize": page_size,
         }
         attempts: List[Dict[str, Any]] = []
-        variants: List[Tuple[str, Dict[str, Any]]] = []
-        for endpoint in [
-            "/nacos/v1/cs/history/list",
-            "/nacos/v1/cs/history",
-            "/nacos/v2/cs/history/list",
-            "/nacos/v2/cs/history",
-        ]:
-            params = dict(base_params)
-            if tenant:
-                if "/v2/" in endpoint:
-                    params["namespaceId"] = tenant
-                else:
-                    params["tenant"] = tenant
-            variants.append((endpoint, params))
-            if tenant:
-                # Try the alternate namespace key as fallback.
-                alt_params = dict(base_params)
-                alt_params["namespaceId" if "tenant" in params else "tenant"] = tenant
-                variants.append((endpoint, alt_params))
+        variants: List[Tuple[str, Optional[str]]] = []
+        for endpoint, primary_key in _HISTORY_LIST_ENDPOINTS:
+            if not tenant:
+                variants.append((endpoint, None))
+                continue
+            variants.append((endpoint, primary_key))
+            # Try the alternate namespace key as fallback.
+            variants.append((endpoint, "tenant" if primary_key == "namespaceId" else "namespaceId"))
+
+        hit_key = (self.server_addr, tenant or "")
+        hit = _HISTORY_ENDPOINT_HITS.get(hit_key)
+        if hit is not None:
+            # Try the endpoint that last answered for this namespace first (primary key
+            # before fallback, as listed above).
+            variants.sort(key=lambda variant: variant[0] != hit)
 
         last_payload: Dict[str, Any] = {}
-        for endpoint, params in variants:
+        for endpoint, namespace_key in variants:
+            params = dict(base_params)
+            if namespace_key:
+                params[namespace_key] = tenant
             try:
                 response = self._request("GET", endpoint, params=params)
-                payload = json.loads(response)
+                payload = _loads(response)
             except Exception as exc:
                 attempts.append({"endpoint": endpoint, "params": params, "error": str(exc)})
                 continue
@@ -309,21 +592,21 @@ class NacosClient:
                 self._normalize_history_payload(payload)
 
                 data_section = payload.get("data")
-                page_items = payload.get("normalized_items") or payload.get("pageItems") or payload.get("items")
+                page_items = _first(payload, "normalized_items", "pageItems", "items")
                 if not page_items and isinstance(data_section, dict):
-                    page_items = (
-                        data_section.get("normalized_items")
-                        or data_section.get("pageItems")
-                        or data_section.get("items")
-                    )
+                    page_items = _first(data_section, "normalized_items", "pageItems", "items")
 
                 total = None
                 if isinstance(data_section, dict):
-                    total = data_section.get("totalCount") or data_section.get("total")
+                    total = _first(data_section, "totalCount", "total")
                 if total is None:
-                    total = payload.get("totalCount") or payload.get("total")
+                    total = _first(payload, "totalCount", "total")
 
                 if page_items or (isinstance(total, int) and total > 0):
+                    # Only learn endpoints that answered with their own namespace key: a server
+                    # that ignores the fallback key answers from the public namespace instead.
+                    if namespace_key in (None, _HISTORY_NAMESPACE_KEYS[endpoint]):
+                        _HISTORY_ENDPOINT_HITS[hit_key] = endpoint
                     payload["history_attempts"] = attempts
                     return payload
 
@@ -346,15 +629,16 @@ class NacosClient:
         params = {"dataId": data_id, "group": group, "nid": nid}
         if tenant:
             params["tenant"] = tenant
+        preferred = None
+        list_hit = _HISTORY_ENDPOINT_HITS.get((self.server_addr, tenant or ""))
+        if list_hit is not None:
+            # Use the API version that served the history list for this namespace.
+            version = "/v2/" if "/v2/" in list_hit else "/v1/"
+            preferred = next(path for path in _HISTORY_DETAIL_ENDPOINTS if version in path)
         response, endpoint = self._request_first_available(
-            "GET",
-            [
-                "/nacos/v1/cs/history",
-                "/nacos/v2/cs/history",
-            ],
-            params=params,
+            "GET", list(_HISTORY_DETAIL_ENDPOINTS), params=params, preferred=preferred
         )
-        payload = json.loads(response)
+        payload = _loads(response)
         if isinstance(payload, dict):
             payload["history_endpoint"] = endpoint
         return payload
@@ -369,11 +653,19 @@ class NacosClient:
     ) -> Dict[str, Any]:
         detail_a = self.get_config_history_detail(data_id, group, namespace, nid_a)
         detail_b = self.get_config_history_detail(data_id, group, namespace, nid_b)
-        content_a = (detail_a.get("content") or "").splitlines()
-        content_b = (detail_b.get("content") or "").splitlines()
-        diff = "\n".join(
-            unified_diff(content_a, content_b, fromfile=f"nid:{nid_a}", tofile=f"nid:{nid_b}")
-        )
+        content_a = detail_a.get("content") or ""
+        content_b = detail_b.get("content") or ""
+        if content_a == content_b:
+            diff = ""
+        else:
+            diff = "\n".join(
+                unified_diff(
+                    content_a.splitlines(),
+                    content_b.splitlines(),
+                    fromfile=f"nid:{nid_a}",
+                    tofile=f"nid:{nid_b}",
+                )
+            )
         return {
             "data_id": data_id,
             "group": group or DEFAULT_GROUP,
@@ -397,13 +689,12 @@ class NacosClient:
             page_no=1,
             page_size=page_size,
         )
-        items = history.get("normalized_items") or history.get("pageItems") or history.get("items") or []
+        items = _first(history, "normalized_items", "pageItems", "items") or []
         if not items and isinstance(history.get("data"), dict):
-            data_section = history.get("data")
-            items = data_section.get("normalized_items") or data_section.get("pageItems") or data_section.get("items") or []
+            items = _first(history["data"], "normalized_items", "pageItems", "items") or []
         latest = items[0] if items else None
         latest_nid = (
-            str(latest.get("nid") or latest.get("id") or "") if isinstance(latest, dict) else ""
+            str(_first(latest, "nid", "id") or "") if isinstance(latest, dict) else ""
         )
         return {
             "data_id": data_id,
@@ -428,10 +719,9 @@ class NacosClient:
             page_no=1,
             page_size=page_size,
         )
-        items = history.get("normalized_items") or history.get("pageItems") or history.get("items") or []
+        items = _first(history, "normalized_items", "pageItems", "items") or []
         if not items and isinstance(history.get("data"), dict):
-            data_section = history.get("data")
-            items = data_section.get("normalized_items") or data_section.get("pageItems") or data_section.get("items") or []
+            items = _first(history["data"], "normalized_items", "pageItems", "items") or []
         if len(items) < 2:
             return {
                 "data_id": data_id,
@@ -440,8 +730,8 @@ class NacosClient:
                 "error": "历史版本数量不足，无法自动对比",
                 "history": history,
             }
-        nid_a = str(items[0].get("nid") or items[0].get("id") or "")
-        nid_b = str(items[1].get("nid") or items[1].get("id") or "")
+        nid_a = str(_first(items[0], "nid", "id") or "")
+        nid_b = str(_first(items[1], "nid", "id") or "")
         if not nid_a or not nid_b:
             return {
                 "data_id": data_id,
@@ -470,8 +760,8 @@ class NacosClient:
         }
         if namespace_id:
             params["namespaceId"] = namespace_id
-        response = self._request("GET", "/nacos/v1/ns/instance/list", params=params)
-        payload = json.loads(response)
+        response = self._request("GET", "/nacos/v1/ns/instance/list", params=params, _params_owned=True)
+        payload = _loads(response)
         if healthy_only:
             hosts = payload.get("hosts", [])
             payload["hosts"] = [host for host in hosts if host.get("healthy") is True]
@@ -487,7 +777,7 @@ class NacosClient:
         payload = self.list_instances(service_name, group_name, namespace, registry_namespace)
         hosts = payload.get("hosts", [])
         total = len(hosts)
-        healthy = len([h for h in hosts if h.get("healthy") is True])
+        healthy = sum(1 for h in hosts if h.get("healthy") is True)
         return {
             "service_name": service_name,
             "group": group_name or DEFAULT_GROUP,
@@ -510,23 +800,39 @@ class NacosClient:
         history_page_size: int = 10,
         healthy_only: bool = False,
     ) -> Dict[str, Any]:
-        context: Dict[str, Any] = {
-            "service": self.check_service_registration(
-                service_name, group, namespace, registry_namespace
-            ),
-            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
-        }
-        if data_id:
-            context["config"] = self.get_config(data_id, group, namespace)
-            if include_history:
-                context["config_history"] = self.list_config_history(
-                    data_id=data_id,
-                    group=group,
-                    namespace=namespace,
-                    page_size=history_page_size,
-                )
-        if data_ids:
-            context["configs"] = self.get_configs(data_ids, group, namespace)
+        namespace = self._namespace_param(namespace)
+        # The sub-requests are independent, so the config lookups run on a pool while this
+        # thread checks the service. A service-only call needs no pool at all.
+        executor = ThreadPoolExecutor(max_workers=3) if data_id or data_ids else None
+        try:
+            config_future = history_future = configs_future = None
+            if executor is not None:
+                if data_id:
+                    config_future = executor.submit(self.get_config, data_id, group, namespace)
+                    if include_history:
+                        history_future = executor.submit(
+                            self.list_config_history,
+                            data_id=data_id,
+                            group=group,
+                            namespace=namespace,
+                            page_size=history_page_size,
+                        )
+                if data_ids:
+                    configs_future = executor.submit(self.get_configs, data_ids, group, namespace)
+
+            context: Dict[str, Any] = {
+                "service": self.check_service_registration(service_name, group, namespace, registry_namespace),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+            }
+            if config_future is not None:
+                context["config"] = config_future.result()
+            if history_future is not None:
+                context["config_history"] = history_future.result()
+            if configs_future is not None:
+                context["configs"] = configs_future.result()
+        finally:
+            if executor is not None:
+                executor.shutdown()
         if healthy_only:
             context["service"]["instances"] = [
                 host for host in context["service"]["instances"] if host.get("healthy") is True
@@ -534,6 +840,31 @@ class NacosClient:
         return context
 
 
+# Clients reused across tool calls, most recently used last. Bounded because the keys
+# come from tool arguments, and keyed by a hash of the credentials like _AUTH_CACHE.
+_CLIENTS: Dict[Tuple[Optional[str], str, Optional[str]], NacosClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+_CLIENTS_MAXSIZE = 32
+
+
+def _client(
+    server_addr: Optional[str],
+    username: Optional[str],
+    password: Optional[str],
+    namespace: Optional[str],
+) -> NacosClient:
+    # Clients are stateless apart from auth and are safe to share across tool calls.
+    key = (server_addr, _credential_id(username, password), namespace)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.pop(key, None)
+        if client is None:
+            client = NacosClient(server_addr, username, password, namespace)
+        _CLIENTS[key] = client
+        if len(_CLIENTS) > _CLIENTS_MAXSIZE:
+            del _CLIENTS[next(iter(_CLIENTS))]
+        return client
+
+
 def get_config(
     data_id: str,
     group: Optional[str] = None,
@@ -543,7 +874,7 @@ def get_config(
     password: Optional[str] = None,
 ) -> Dict[str, Any]:
     try:
-        return NacosClient(server_addr, username, password, namespace).get_config(data_id, group, namespace)
+        return _client(server_addr, username, password, namespace).get_config(data_id, group, namespace)
     except Exception as exc:
         return {"error": str(exc), "data_id": data_id, "group": group, "namespace": namespace}
 
@@ -557,7 +888,7 @@ def get_configs(
     password: Optional[str] = None,
 ) -> Dict[str, Any]:
     try:
-        return NacosClient(server_addr, username, password, namespace).get_configs(data_ids, group, namespace)
+        return _client(server_addr, username, password, namespace).get_configs(data_ids, group, namespace)
     except Exception as exc:
         return {"error": str(exc), "data_ids": data_ids, "group": group, "namespace": namespace}
 
@@ -573,7 +904,7 @@ def list_config_history(
     password: Optional[str] = None,
 ) -> Dict[str, Any]:
     try:
-        return NacosClient(server_addr, username, password, namespace).list_config_history(
+        return _client(server_addr, username, password, namespace).list_config_history(
             data_id, group, namespace, page_no, page_size
         )
     except Exception as exc:
@@ -590,7 +921,7 @@ def get_latest_history(
     password: Optional[str] = None,
 ) -> Dict[str, Any]:
     try:
-        return NacosClient(server_addr, username, password, namespace).get_latest_history(
+        return _client(server_addr, username, password, namespace).get_latest_history(
             data_id, group, namespace, page_size
         )
     except Exception as exc:
@@ -607,7 +938,7 @@ def get_config_history_detail(
     password: Optional[str] = None,
 ) -> Dict[str, Any]:
     try:
-        return NacosClient(server_addr, username, password, namespace).get_config_history_detail(
+        return _client(server_addr, username, password, namespace).get_config_history_detail(
             data_id, group, namespace, nid
         )
     except Exception as exc:
@@ -631,7 +962,7 @@ def compare_config_history(
     password: Optional[str] = None,
 ) -> Dict[str, Any]:
     try:
-        return NacosClient(server_addr, username, password, namespace).compare_config_history(
+        return _client(server_addr, username, password, namespace).compare_config_history(
             data_id, group, namespace, nid_a, nid_b
         )
     except Exception as exc:
@@ -655,7 +986,7 @@ def compare_latest_history(
     password: Optional[str] = None,
 ) -> Dict[str, Any]:
     try:
-        return NacosClient(server_addr, username, password, namespace).compare_latest_history(
+        return _client(server_addr, username, password, namespace).compare_latest_history(
             data_id, group, namespace, page_size
         )
     except Exception as exc:
@@ -674,7 +1005,7 @@ def list_instances(
 ) -> Dict[str, Any]:
     try:
         registry_namespace = registry_namespace if registry_namespace is not None else DEFAULT_REGISTRY_NAMESPACE
-        return NacosClient(server_addr, username, password, namespace).list_instances(
+        return _client(server_addr, username, password, namespace).list_instances(
             service_name, group, namespace, registry_namespace, healthy_only
         )
     except Exception as exc:
@@ -692,7 +1023,7 @@ def check_service_registration(
 ) -> Dict[str, Any]:
     try:
         registry_namespace = registry_namespace if registry_namespace is not None else DEFAULT_REGISTRY_NAMESPACE
-        return NacosClient(server_addr, username, password, namespace).check_service_registration(
+        return _client(server_addr, username, password, namespace).check_service_registration(
             service_name, group, namespace, registry_namespace
         )
     except Exception as exc:
@@ -715,7 +1046,7 @@ def collect_service_context(
 ) -> Dict[str, Any]:
     try:
         registry_namespace = registry_namespace if registry_namespace is not None else DEFAULT_REGISTRY_NAMESPACE
-        return NacosClient(server_addr, username, password, namespace).collect_service_context(
+        return _client(server_addr, username, password, namespace).collect_service_context(
             service_name=service_name,
             data_id=data_id,
             data_ids=data_ids,
@@ -730,165 +1061,50 @@ def collect_service_context(
         return {"error": str(exc), "service_name": service_name, "group": group, "namespace": namespace}
 
 
-if FASTMCP_AVAILABLE:
-    _configure_utf8_stdio()
-    mcp = FastMCP("Nacos 配置与服务状态工具")
+_TOOL_FUNCTIONS = (
+    get_config,
+    get_configs,
+    list_config_history,
+    get_latest_history,
+    get_config_history_detail,
+    compare_latest_history,
+    compare_config_history,
+    list_instances,
+    check_service_registration,
+    collect_service_context,
+)
 
-    @mcp.tool()
-    def get_config_tool(
-        data_id: str,
-        group: Optional[str] = None,
-        namespace: Optional[str] = None,
-        server_addr: Optional[str] = None,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return get_config(data_id, group, namespace, server_addr, username, password)
 
-    @mcp.tool()
-    def get_configs_tool(
-        data_ids: Optional[List[str]] = None,
-        group: Optional[str] = None,
-        namespace: Optional[str] = None,
-        server_addr: Optional[str] = None,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return get_configs(data_ids, group, namespace, server_addr, username, password)
+def register_tools(server: Any, tool_names: Optional[Iterable[str]] = None) -> None:
+    # The module functions already have the tool signatures, so register them directly
+    # under the existing "<name>_tool" names instead of wrapping each one.
+    wanted = {name.strip() for name in tool_names if name.strip()} if tool_names is not None else None
+    for fn in _TOOL_FUNCTIONS:
+        name = f"{fn.__name__}_tool"
+        if wanted and name not in wanted and fn.__name__ not in wanted:
+            continue
+        server.tool(name=name)(fn)
 
-    @mcp.tool()
-    def list_config_history_tool(
-        data_id: str,
-        group: Optional[str] = None,
-        namespace: Optional[str] = None,
-        page_no: int = 1,
-        page_size: int = 20,
-        server_addr: Optional[str] = None,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return list_config_history(data_id, group, namespace, page_no, page_size, server_addr, username, password)
 
-    @mcp.tool()
-    def get_latest_history_tool(
-        data_id: str,
-        group: Optional[str] = None,
-        namespace: Optional[str] = None,
-        page_size: int = 10,
-        server_addr: Optional[str] = None,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return get_latest_history(data_id, group, namespace, page_size, server_addr, username, password)
-
-    @mcp.tool()
-    def get_config_history_detail_tool(
-        data_id: str,
-        nid: str,
-        group: Optional[str] = None,
-        namespace: Optional[str] = None,
-        server_addr: Optional[str] = None,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return get_config_history_detail(data_id, nid, group, namespace, server_addr, username, password)
-
-    @mcp.tool()
-    def compare_latest_history_tool(
-        data_id: str,
-        group: Optional[str] = None,
-        namespace: Optional[str] = None,
-        page_size: int = 10,
-        server_addr: Optional[str] = None,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return compare_latest_history(data_id, group, namespace, page_size, server_addr, username, password)
-
-    @mcp.tool()
-    def compare_config_history_tool(
-        data_id: str,
-        nid_a: str,
-        nid_b: str,
-        group: Optional[str] = None,
-        namespace: Optional[str] = None,
-        server_addr: Optional[str] = None,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return compare_config_history(data_id, nid_a, nid_b, group, namespace, server_addr, username, password)
-
-    @mcp.tool()
-    def list_instances_tool(
-        service_name: str,
-        group: Optional[str] = None,
-        namespace: Optional[str] = None,
-        registry_namespace: Optional[str] = None,
-        healthy_only: bool = False,
-        server_addr: Optional[str] = None,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return list_instances(
-            service_name, group, namespace, registry_namespace, healthy_only, server_addr, username, password
-        )
-
-    @mcp.tool()
-    def check_service_registration_tool(
-        service_name: str,
-        group: Optional[str] = None,
-        namespace: Optional[str] = None,
-        registry_namespace: Optional[str] = None,
-        server_addr: Optional[str] = None,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return check_service_registration(
-            service_name, group, namespace, registry_namespace, server_addr, username, password
-        )
-
-    @mcp.tool()
-    def collect_service_context_tool(
-        service_name: str,
-        data_id: Optional[str] = None,
-        data_ids: Optional[List[str]] = None,
-        group: Optional[str] = None,
-        namespace: Optional[str] = None,
-        registry_namespace: Optional[str] = None,
-        include_history: bool = False,
-        history_page_size: int = 10,
-        healthy_only: bool = False,
-        server_addr: Optional[str] = None,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return collect_service_context(
-            service_name=service_name,
-            data_id=data_id,
-            data_ids=data_ids,
-            group=group,
-            namespace=namespace,
-            registry_namespace=registry_namespace,
-            include_history=include_history,
-            history_page_size=history_page_size,
-            healthy_only=healthy_only,
-            server_addr=server_addr,
-            username=username,
-            password=password,
-        )
+if FASTMCP_AVAILABLE:
+    _configure_utf8_stdio()
+    mcp = FastMCP("Nacos 配置与服务状态工具")
+    register_tools(mcp, DEFAULT_TOOLS.split(",") if DEFAULT_TOOLS else None)
 
 
 def main() -> None:
+    # Diagnostics go to stderr; stdout carries the MCP stdio transport.
+    logging.basicConfig(stream=sys.stderr, format="%(message)s")
     if FastMCP is None:
-        print("错误: 未安装 fastmcp 库")
-        print("请运行: pip install fastmcp")
+        logger.error("错误: 未安装 fastmcp 库")
+        logger.error("请运行: pip install fastmcp")
         return
 
     try:
         _configure_utf8_stdio()
         mcp.run()
-    except Exception as exc:
-        print(f"运行 FastMCP 服务器时出错: {exc}")
+    except Exception:
+        logger.exception("运行 FastMCP 服务器时出错")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+import json
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC))
+
+import mcp_services  # noqa: E402
+
+# Every package in this repo ships its own copy of the mcp_services package; when the
+# whole repo is tested in one session, let the first one imported find this subpackage too.
+if str(SRC / "mcp_services") not in mcp_services.__path__:
+    mcp_services.__path__.append(str(SRC / "mcp_services"))
+
+from mcp_services.nacos import tool  # noqa: E402
+
+
+class FakeNacos:
+    # Minimal Nacos OpenAPI: login, configs, v1 history and instance list.
+    # Like a real v1 server, history ignores namespaceId and only honours tenant.
+
+    def __init__(self) -> None:
+        self.users: Dict[str, str] = {"nacos": "secret"}
+        self.tokens: set = set()
+        self.configs: Dict[Tuple[str, str], str] = {}
+        self.history: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self.redirects: Dict[str, str] = {}
+        self.requests: List[Tuple[str, str, Dict[str, str]]] = []
+        # Client (host, port) pairs seen, i.e. TCP connections opened to this server.
+        self.connections: set = set()
+        self.delay = 0.0
+        self.addr = ""
+        self._token_seq = 0
+        self._lock = threading.Lock()
+
+    def issue_token(self) -> str:
+        with self._lock:
+            self._token_seq += 1
+            token = f"tok-{self._token_seq}"
+            self.tokens.add(token)
+        return token
+
+    def revoke_tokens(self) -> None:
+        # What a restart or a token secret rotation looks like to clients.
+        self.tokens.clear()
+
+    def paths(self) -> List[str]:
+        return [urlsplit(raw).path for _, raw, _ in self.requests]
+
+    def handle(self, method: str, raw_path: str, query: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        self.requests.append((method, raw_path, query))
+        if self.delay:
+            time.sleep(self.delay)
+        path = urlsplit(raw_path).path
+        if path in self.redirects:
+            query_string = urlsplit(raw_path).query
+            location = self.redirects[path] + (f"?{query_string}" if query_string else "")
+            return 302, {"Location": location}, b""
+        if path == "/nacos/v1/auth/login":
+            if self.users.get(query.get("username", "")) != query.get("password"):
+                return 403, {}, b"unknown user!"
+            return 200, {}, json.dumps({"accessToken": self.issue_token(), "tokenTtl": 18000}).encode()
+        if self.users and query.get("accessToken") not in self.tokens:
+            return 403, {}, b"user not found!"
+        namespace = query.get("tenant") or "public"
+        data_id = query.get("dataId", "")
+        if path == "/nacos/v1/cs/configs":
+            content = self.configs.get((namespace, data_id))
+            if content is None:
+                return 404, {}, b"config data not exist"
+            return 200, {}, content.encode()
+        if path in ("/nacos/v1/cs/history/list", "/nacos/v1/cs/history") and "nid" not in query:
+            items = self.history.get((namespace, data_id), [])
+            return 200, {}, json.dumps({"totalCount": len(items), "pageItems": items}).encode()
+        if path == "/nacos/v1/cs/history":
+            for items in self.history.values():
+                for item in items:
+                    if item["id"] == query["nid"]:
+                        return 200, {}, json.dumps(item).encode()
+            return 404, {}, b"history not exist"
+        if path == "/nacos/v1/ns/instance/list":
+            hosts = [{"ip": "10.0.0.1", "healthy": True}, {"ip": "10.0.0.2", "healthy": False}]
+            return 200, {}, json.dumps({"name": query.get("serviceName"), "hosts": hosts}).encode()
+        return 404, {}, b"no such api"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def _dispatch(self, query: Dict[str, str]) -> None:
+        self.server.nacos.connections.add(self.client_address)
+        status, headers, body = self.server.nacos.handle(self.command, self.path, query)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._dispatch({k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        query = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        query.update({k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()})
+        self._dispatch(query)
+
+
+def _reset_tool_state() -> None:
+    for cache in (
+        tool._AUTH_CACHE,
+        tool._RESPONSE_CACHE,
+        tool._INFLIGHT,
+        tool._HISTORY_ENDPOINT_HITS,
+        tool._ENDPOINT_HITS,
+        tool._CLIENTS,
+    ):
+        cache.clear()
+    tool._close_pools()
+    tool._POOLS.clear()
+    # urlopen builds its opener, proxy settings included, once per process.
+    urllib.request.install_opener(None)
+
+
+def start_fake_nacos() -> Tuple[FakeNacos, ThreadingHTTPServer]:
+    fake = FakeNacos()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.nacos = fake
+    fake.addr = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return fake, server
+
+
+@pytest.fixture
+def nacos():
+    _reset_tool_state()
+    fake, server = start_fake_nacos()
+    yield fake
+    server.shutdown()
+    server.server_close()
+    _reset_tool_state()
+
+
+@pytest.fixture(params=["urllib3", "urlopen"])
+def transport(request, monkeypatch):
+    # Run a test against the pooled urllib3 transport and the urlopen fallback.
+    if request.param == "urllib3" and not tool.URLLIB3_AVAILABLE:
+        pytest.skip("urllib3 is not installed")
+    if request.param == "urlopen":
+        monkeypatch.setattr(tool, "urllib3", None)
+    return request.param
+
+
+@pytest.fixture
+def other_nacos():
+    fake, server = start_fake_nacos()
+    yield fake
+    server.shutdown()
+    server.server_close()
@@ -3,35 +3,50 @@
 上传包到 PyPI 的辅助脚本
 """
 import argparse
+import configparser
 import os
 import subprocess
 import sys
 from pathlib import Path
 
+# 已解析的 token，None 表示尚未读取
+_TOKEN_CACHE = None
+
 def read_token_from_pypirc():
-    """从 .pypirc 文件读取 token"""
+    """从 .pypirc 文件读取 token（解析一次后缓存）"""
+    global _TOKEN_CACHE
+    if _TOKEN_CACHE is not None:
+        return _TOKEN_CACHE or None
+    
     pypirc_path = Path.home() / ".pypirc"
     if not pypirc_path.exists():
         return None
     
+    token = ""
     try:
-        # 尝试多种编码读取
-        for encoding in ['utf-8', 'utf-8-sig', 'gbk', 'latin-1']:
+        # 只读取一次文件，先按 UTF-8（兼容 BOM）解码，失败时退回 latin-1
+        raw = pypirc_path.read_bytes()
+        for encoding in ['utf-8-sig', 'latin-1']:
             try:
-                with open(pypirc_path, 'r', encoding=encoding) as f:
-                    content = f.read()
-                    # 查找 password 行
-                    for line in content.split('\n'):
-                        if 'password' in line.lower() and '=' in line:
-                            token = line.split('=', 1)[1].strip()
-                            if token.startswith('pypi-'):
-                                return token
-            except (UnicodeDecodeError, UnicodeError):
+                content = raw.decode(encoding)
+            except UnicodeDecodeError:
                 continue
+            config = configparser.ConfigParser(interpolation=None)
+            config.read_string(content, source=str(pypirc_path))
+            # 优先使用 [pypi] 段，其次查找任意段中以 pypi- 开头的 password
+            sections = sorted(config.sections(), key=lambda name: name != 'pypi')
+            for section in sections:
+                password = config.get(section, 'password', fallback='').strip()
+                if password.startswith('pypi-'):
+                    token = password
+                    break
+            break
     except Exception as e:
         print(f"读取配置文件时出错: {e}")
+        return None
     
-    return None
+    _TOKEN_CACHE = token
+    return token or None
 
 def upload_to_pypi(dist_dir: Path):
     """上传包到 PyPI"""
@@ -40,6 +55,12 @@ def upload_to_pypi(dist_dir: Path):
         print(f"错误: dist 目录不存在，请先运行 'py -m build'（{dist_dir}）")
         return False
     
+    # 在 Python 中展开待上传的文件，不依赖 shell 处理 "*"
+    dist_files = sorted(str(p) for p in dist_dir.glob("*.whl")) + sorted(str(p) for p in dist_dir.glob("*.tar.gz"))
+    if not dist_files:
+        print(f"错误: dist 目录中没有可上传的 .whl 或 .tar.gz 文件（{dist_dir}）")
+        return False
+    
     # 获取 token
     token = read_token_from_pypirc()
     if not token:
@@ -57,12 +78,13 @@ def upload_to_pypi(dist_dir: Path):
     
     try:
         if pypirc_path.exists():
-            pypirc_path.rename(pypirc_backup)
+            # os.replace 会覆盖上次中断遗留的 .pypirc.bak（Windows 下 rename 会报 FileExistsError）
+            os.replace(pypirc_path, pypirc_backup)
         
         # 上传
         print("开始上传到 PyPI...")
         result = subprocess.run(
-            [sys.executable, "-m", "twine", "upload", str(dist_dir / "*")],
+            [sys.executable, "-m", "twine", "upload", *dist_files],
             check=False
         )
         
@@ -70,9 +92,9 @@ def upload_to_pypi(dist_dir: Path):
     finally:
         # 恢复配置文件
         if pypirc_backup.exists():
-            pypirc_backup.rename(pypirc_path)
+            os.replace(pypirc_backup, pypirc_path)
 
-def parse_args() -> argparse.Namespace:
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="上传包到 PyPI 的辅助脚本")
     parser.add_argument(
         "package_dir",
@@ -85,7 +107,14 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="dist 目录（可选，覆盖默认的 package_dir/dist）",
     )
-    return parser.parse_args()
+    return parser
+
+
+_PARSER = _build_parser()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    return _PARSER.parse_args(argv)
 
 
 if __name__ == "__main__":